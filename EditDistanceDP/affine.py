@@ -0,0 +1,160 @@
+from array import array
+
+from array_engine import DIAGONAL, LEFT, UP, DirectionMatrix, prepare_scoring
+from seq_io import gap_and_join
+from substitution import SubstitutionTable
+
+
+def align_affine(
+        seq1: str,
+        seq2: str,
+        match_award=-3,
+        indel_penalty=5,
+        sub_penalty=1,
+        banded_width=-1,
+        gap='-',
+        gap_open=10,
+        substitution: SubstitutionTable | None = None,
+        score_only=False
+) -> tuple[float, str | None, str | None]:
+    """
+        Align seq1 against seq2 with affine gap costs (Gotoh): a run of k gaps costs gap_open + k * indel_penalty.
+        Three tables are filled side by side: the best alignment of each prefix pair that ends with
+        a diagonal step, with a gap in seq1 (left) and with a gap in seq2 (up).
+        Each keeps two rolling rows of costs; the three back-pointers of a cell share one byte
+        (diagonal table in bits 0-1, left in bits 2-3, up in bits 4-5), so memory matches the array engine.
+        Ties prefer the diagonal table, then left, then up, like the other engines.
+        Other parameters are the same as align().
+        :return: alignment cost, alignment 1, alignment 2
+    """
+    n, m = len(seq1), len(seq2)
+    band = banded_width if banded_width != -1 else max(n, m)
+    if abs(n - m) > band:
+        raise ValueError(f'banded_width={banded_width} does not reach the end of the alignment')
+
+    codes1, codes2, substitution, typecode, inf = prepare_scoring(seq1, seq2, match_award, indel_penalty,
+                                                                  sub_penalty, substitution)
+    directions = None if score_only else DirectionMatrix(n + 1, m + 1, banded_width)
+    cost, state = _fill(codes1, codes2, substitution, gap_open, indel_penalty, band, typecode, inf, directions)
+    if score_only:
+        return cost, None, None
+    return cost, *_traceback(seq1, seq2, directions, state, gap)
+
+
+def _fill(seq1: bytes, seq2: bytes, substitution: SubstitutionTable, gap_open, gap_extend, band: int,
+          typecode: str, inf: float, directions: DirectionMatrix | None) -> tuple[float, int]:
+    """
+    Returns the alignment cost and the table the best alignment ends in.
+    """
+    n, m = len(seq1), len(seq2)
+    opening = gap_open + gap_extend
+
+    # one spare column so the cell just right of the band can always be read as infinity
+    prev_diagonal, prev_left, prev_up = (array(typecode, [inf]) * (m + 2) for _ in range(3))
+    cur_diagonal, cur_left, cur_up = (array(typecode, [inf]) * (m + 2) for _ in range(3))
+    prev_diagonal[0] = 0
+    for x in range(1, min(m, band) + 1):  # Space: O(m) Time: O(m)
+        prev_left[x] = gap_open + x * gap_extend
+        if directions is not None:
+            directions.data[directions.offset(x, 0)] = (DIAGONAL if x == 1 else LEFT) << 2
+
+    for y in range(1, n + 1):  # Space: O(kn) bytes Time: O(kn)
+        lo = max(1, y - band)
+        hi = min(m, y + band)
+        cur_diagonal[lo - 1] = cur_left[lo - 1] = cur_up[lo - 1] = inf
+        if lo == 1 and y <= band:
+            cur_up[0] = gap_open + y * gap_extend
+            if directions is not None:
+                directions.data[directions.offset(0, y)] = (DIAGONAL if y == 1 else UP) << 4
+
+        substitution_costs = substitution[seq1[y - 1]]
+        # (x - 1, y - 1) and (x - 1, y) in each table
+        diagonal_d, diagonal_l, diagonal_u = prev_diagonal[lo - 1], prev_left[lo - 1], prev_up[lo - 1]
+        left_d, left_l, left_u = cur_diagonal[lo - 1], cur_left[lo - 1], cur_up[lo - 1]
+        row_diagonal, row_left, row_up = [], [], []
+        row_directions = bytearray()
+        for b, up_d, up_l, up_u in zip(seq2[lo - 1:hi], prev_diagonal[lo:hi + 1], prev_left[lo:hi + 1],
+                                       prev_up[lo:hi + 1]):
+            if diagonal_d <= diagonal_l and diagonal_d <= diagonal_u:
+                best, code = diagonal_d, DIAGONAL
+            elif diagonal_l <= diagonal_u:
+                best, code = diagonal_l, LEFT
+            else:
+                best, code = diagonal_u, UP
+            new_d = best + substitution_costs[b]
+
+            open_d, extend_l, open_u = left_d + opening, left_l + gap_extend, left_u + opening
+            if open_d <= extend_l and open_d <= open_u:
+                new_l = open_d
+                code |= DIAGONAL << 2
+            elif extend_l <= open_u:
+                new_l = extend_l
+                code |= LEFT << 2
+            else:
+                new_l = open_u
+                code |= UP << 2
+
+            open_d, open_l, extend_u = up_d + opening, up_l + opening, up_u + gap_extend
+            if open_d <= open_l and open_d <= extend_u:
+                new_u = open_d
+                code |= DIAGONAL << 4
+            elif open_l <= extend_u:
+                new_u = open_l
+                code |= LEFT << 4
+            else:
+                new_u = extend_u
+                code |= UP << 4
+
+            row_diagonal.append(new_d)
+            row_left.append(new_l)
+            row_up.append(new_u)
+            row_directions.append(code)
+            diagonal_d, diagonal_l, diagonal_u = up_d, up_l, up_u
+            left_d, left_l, left_u = new_d, new_l, new_u
+
+        cur_diagonal[lo:hi + 1] = array(typecode, row_diagonal)
+        cur_left[lo:hi + 1] = array(typecode, row_left)
+        cur_up[lo:hi + 1] = array(typecode, row_up)
+        if directions is not None:
+            row = directions.offset(0, y)
+            directions.data[row + lo:row + hi + 1] = row_directions
+        prev_diagonal, cur_diagonal = cur_diagonal, prev_diagonal
+        prev_left, cur_left = cur_left, prev_left
+        prev_up, cur_up = cur_up, prev_up
+
+    end_d, end_l, end_u = prev_diagonal[m], prev_left[m], prev_up[m]
+    if end_d <= end_l and end_d <= end_u:
+        return end_d, DIAGONAL
+    if end_l <= end_u:
+        return end_l, LEFT
+    return end_u, UP
+
+
+def _traceback(seq1: str, seq2: str, directions: DirectionMatrix, state: int, gap='-') -> tuple[str, str]:
+    gap, join = gap_and_join(seq1, gap)
+    aligned_sq1: list[str] = []
+    aligned_sq2: list[str] = []
+    data = directions.data
+    x = len(seq2)
+    y = len(seq1)
+    while x > 0 or y > 0:  # Space: O(n+m) Time: O(n+m)
+        code = data[directions.offset(x, y)]
+        if state == DIAGONAL:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(seq2[x - 1])
+            state = code & 3
+            x -= 1
+            y -= 1
+        elif state == LEFT:
+            aligned_sq1.append(gap)
+            aligned_sq2.append(seq2[x - 1])
+            state = code >> 2 & 3
+            x -= 1
+        else:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(gap)
+            state = code >> 4 & 3
+            y -= 1
+    aligned_sq1.reverse()
+    aligned_sq2.reverse()
+    return join(aligned_sq1), join(aligned_sq2)
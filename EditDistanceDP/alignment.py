@@ -1,5 +1,16 @@
 import math
 
+from affine import align_affine
+from array_engine import DirectionMatrix, adaptive_band_width, align_arrays, fill_directions, score, traceback
+from bitparallel import edit_distance, is_unit_cost
+from hirschberg import align_linear_memory
+from local import align_local
+from seq_io import gap_and_join
+from substitution import SubstitutionTable
+from wavefront import align_wavefront
+
+ENGINES = ('table', 'array', 'numpy', 'hirschberg', 'wavefront')
+
 
 class Score:
     def __init__(self, value: int, back_pointer: 'Score', direction: str):
@@ -15,7 +26,14 @@ def align(
         indel_penalty=5,
         sub_penalty=1,
         banded_width=-1,
-        gap='-'
+        gap='-',
+        engine='table',
+        score_only=False,
+        adaptive_band=False,
+        substitution: SubstitutionTable | None = None,
+        gap_open=0,
+        mode='global',
+        x_drop=None
 ) -> tuple[float, str | None, str | None]:
     """
         Align seq1 against seq2 using Needleman-Wunsch
@@ -23,13 +41,82 @@ def align(
         => matrix[i][j]
         :param seq1: the first sequence to align; should be on the "left" of the matrix
         :param seq2: the second sequence to align; should be on the "top" of the matrix
+            (both may be bytes, e.g. from seq_io, in which case the alignments are bytes too)
         :param match_award: how many points to award a match
         :param indel_penalty: how many points to award a gap in either sequence
         :param sub_penalty: how many points to award a substitution
         :param banded_width: banded_width * 2 + 1 is the width of the banded alignment; -1 indicates full alignment
         :param gap: the character to use to represent gaps in the alignment strings
+        :param engine: 'table' keeps the full table of Scores,
+            'array' keeps two rows of costs and a byte per cell of back-pointers,
+            'numpy' fills the same arrays one anti-diagonal at a time with NumPy,
+            'hirschberg' recomputes sub-problems to align in O(n+m) memory,
+            'wavefront' fills tiles of the table in parallel worker processes
+        :param score_only: skip the traceback and keep only two rows (or the band) of costs;
+            the alignment strings are returned as None. Unbanded unit costs (edit distance, e.g. 0/1/1)
+            are scored bit-parallel instead (see bitparallel.py)
+        :param adaptive_band: start from banded_width (or 8 when -1) and double the band until the banded
+            alignment is proven to be the full alignment, then align with that band
+        :param substitution: table of substitution costs indexed by the bytes of the sequences
+            (see substitution.py), replacing match_award and sub_penalty; not supported by the 'table' engine
+        :param gap_open: extra cost to open a run of gaps, so a run of k gaps costs gap_open + k * indel_penalty
+            (affine gaps); only the 'array' engine supports it
+        :param mode: 'global' aligns both sequences end to end, 'local' the cheapest pair of substrings
+            (Smith-Waterman) and 'semi-global' all of seq1 against the cheapest substring of seq2;
+            the last two need the 'array' engine and no band (see local.align_local for where the alignment lies)
+        :param x_drop: in 'local' and 'semi-global' mode, abandon cells costing more than x_drop above the
+            cheapest cell so far, so a query (seq1) found in a genome (seq2) only fills the cells near the match
         :return: alignment cost, alignment 1, alignment 2
     """
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown alignment engine: {engine}')
+    if engine == 'table' and substitution is not None and not score_only:
+        raise ValueError("Substitution tables need the 'array', 'numpy', 'hirschberg' or 'wavefront' engine")
+
+    if x_drop is not None and mode == 'global':
+        raise ValueError("x_drop needs 'local' or 'semi-global' mode")
+    if mode != 'global':
+        if engine != 'array' or banded_width != -1 or adaptive_band or gap_open:
+            raise ValueError(f"{mode} alignment needs the 'array' engine without banding or affine gaps")
+        return align_local(seq1, seq2, match_award, indel_penalty, sub_penalty, gap, mode, x_drop, substitution,
+                           score_only)[:3]
+
+    if gap_open:
+        if engine != 'array' or adaptive_band:
+            raise ValueError("Affine gaps need the 'array' engine without adaptive_band")
+        return align_affine(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, gap, gap_open,
+                            substitution, score_only)
+
+    if score_only and substitution is None and (banded_width == -1 or adaptive_band) \
+            and is_unit_cost(match_award, indel_penalty, sub_penalty):
+        return edit_distance(seq1, seq2) * indel_penalty, None, None
+
+    if adaptive_band:
+        initial_width = banded_width if banded_width != -1 else 8
+        banded_width = adaptive_band_width(seq1, seq2, match_award, indel_penalty, sub_penalty, initial_width,
+                                           substitution)
+
+    if score_only:
+        if engine == 'numpy':
+            from numpy_engine import score_numpy
+            return score_numpy(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width,
+                               substitution), None, None
+        if engine == 'wavefront':
+            return align_wavefront(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, gap,
+                                   substitution, score_only=True)
+        return score(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, substitution), None, None
+
+    if engine == 'array':
+        return align_arrays(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, gap, substitution)
+    if engine == 'numpy':
+        # numpy is only needed by this engine
+        from numpy_engine import align_numpy
+        return align_numpy(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, gap, substitution)
+    if engine == 'hirschberg':
+        return align_linear_memory(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, gap,
+                                   substitution)
+    if engine == 'wavefront':
+        return align_wavefront(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, gap, substitution)
 
     table: dict[tuple[int, int], Score] = {}
     if banded_width == -1: # Space: O(n*m) Time: O(n*m)
@@ -43,8 +130,9 @@ def align(
         for y in range(1, len(seq1) + 1):
             for x in range(max(1, y - banded_width), min(len(seq2) + 1, y + banded_width + 1)):
                 fill_table(seq1, seq2, x, y, match_award, indel_penalty, sub_penalty, table)  # Space: O(k) Time:O(k)
-    aligned_sq1 = ""
-    aligned_sq2 = ""
+    gap, join = gap_and_join(seq1, gap)
+    aligned_sq1: list[str] = []
+    aligned_sq2: list[str] = []
     x = len(seq2)
     y = len(seq1)
     while x > 0 or y > 0: # back trace Space: O(n+m) Time: O(n+m)
@@ -52,26 +140,29 @@ def align(
         if current_box is None:
             break
         if current_box.direction == "diagonal":
-            aligned_sq1 = seq1[y - 1] + aligned_sq1
-            aligned_sq2 = seq2[x - 1] + aligned_sq2
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(seq2[x - 1])
             x -= 1
             y -= 1
         elif current_box.direction == "left":
-            aligned_sq1 = "-" + aligned_sq1
-            aligned_sq2 = seq2[x - 1] + aligned_sq2
+            aligned_sq1.append(gap)
+            aligned_sq2.append(seq2[x - 1])
             x -= 1
         elif current_box.direction == "up":
-            aligned_sq1 = seq1[y - 1] + aligned_sq1
-            aligned_sq2 = "-" + aligned_sq2
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(gap)
             y -= 1
-    return table[(len(seq2), len(seq1))].value, aligned_sq1, aligned_sq2
+    # built back to front; reversing once keeps the back trace linear in the alignment length
+    aligned_sq1.reverse()
+    aligned_sq2.reverse()
+    return table[(len(seq2), len(seq1))].value, join(aligned_sq1), join(aligned_sq2)
 
 
 def init_banded_base_case(seq1: str, seq2: str, banded_width: int, indel_penalty: int,
                           table: dict[tuple[int, int], Score]):
-    for y in range(min(len(seq1), banded_width + 1)):
+    for y in range(min(len(seq1), banded_width) + 1):
         table[(0, y)] = Score(y * indel_penalty, None, "up")
-    for x in range(min(len(seq2), banded_width + 1)):
+    for x in range(min(len(seq2), banded_width) + 1):
         table[(x, 0)] = Score(x * indel_penalty, None, "left")
 
 
@@ -0,0 +1,301 @@
+import math
+from array import array
+
+from seq_io import gap_and_join
+from substitution import SubstitutionTable, cheapest, encode_pair, has_integer_costs, uniform_table
+
+DIAGONAL, LEFT, UP = 1, 2, 3
+
+# Stands in for infinity in integer cost rows; adding a few penalties to it can't overflow 'q'
+INT_INF = 1 << 60
+
+
+class DirectionMatrix:
+    """
+    Back-pointers of a filled table, one byte per cell (DIAGONAL, LEFT or UP).
+    A banded table only stores the banded_width * 2 + 1 cells of each row that lie inside the band.
+    """
+
+    def __init__(self, rows: int, columns: int, banded_width: int = -1):
+        self.rows = rows
+        self.columns = columns
+        self.banded_width = banded_width
+        self.stride = columns if banded_width == -1 else 2 * banded_width + 1
+        self.data = bytearray(rows * self.stride)
+
+    def offset(self, x: int, y: int) -> int:
+        if self.banded_width == -1:
+            return y * self.stride + x
+        return y * self.stride + x - y + self.banded_width
+
+    def __getitem__(self, cell: tuple[int, int]) -> int:
+        x, y = cell
+        return self.data[self.offset(x, y)]
+
+
+def align_arrays(
+        seq1: str,
+        seq2: str,
+        match_award=-3,
+        indel_penalty=5,
+        sub_penalty=1,
+        banded_width=-1,
+        gap='-',
+        substitution: SubstitutionTable | None = None
+) -> tuple[float, str | None, str | None]:
+    """
+        Align seq1 against seq2 with two rolling rows of typed costs and a byte-per-cell traceback matrix.
+        Gives the same cost and alignment strings as the table version of align().
+        Parameters are the same as align().
+        :return: alignment cost, alignment 1, alignment 2
+    """
+    cost, directions = fill_directions(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width,
+                                       substitution)
+    aligned_sq1, aligned_sq2 = traceback(seq1, seq2, directions, gap)
+    return cost, aligned_sq1, aligned_sq2
+
+
+def fill_directions(seq1: str, seq2: str, match_award=-3, indel_penalty=5, sub_penalty=1,
+                    banded_width=-1, substitution: SubstitutionTable | None = None) -> tuple[float, DirectionMatrix]:
+    """
+    Fill the alignment table keeping only two rows of costs.
+    Returns the alignment cost and the back-pointer of every cell.
+    """
+    n, m = len(seq1), len(seq2)
+    band = banded_width if banded_width != -1 else max(n, m)
+    if abs(n - m) > band:
+        raise ValueError(f'banded_width={banded_width} does not reach the end of the alignment')
+
+    seq1, seq2, substitution, typecode, inf = prepare_scoring(seq1, seq2, match_award, indel_penalty,
+                                                              sub_penalty, substitution)
+    directions = DirectionMatrix(n + 1, m + 1, banded_width)
+    data = directions.data
+
+    # one spare column so the cell just right of the band can always be read as infinity
+    prev = array(typecode, [inf]) * (m + 2)
+    cur = array(typecode, [inf]) * (m + 2)
+    for x in range(min(m, band) + 1):  # Space: O(m) Time: O(m)
+        prev[x] = x * indel_penalty
+        data[directions.offset(x, 0)] = LEFT
+
+    for y in range(1, n + 1):  # Space: O(kn) bytes Time: O(kn)
+        lo = max(1, y - band)
+        hi = min(m, y + band)
+        row = directions.offset(0, y)
+        if lo == 1 and y <= band:
+            cur[0] = y * indel_penalty
+            data[row] = UP
+        else:
+            cur[lo - 1] = inf
+
+        substitution_costs = substitution[seq1[y - 1]]
+        left = cur[lo - 1]
+        diagonal = prev[lo - 1]
+        costs = []
+        push_cost = costs.append
+        row_directions = bytearray()
+        push_direction = row_directions.append
+        for b, up in zip(seq2[lo - 1:hi], prev[lo:hi + 1]):
+            replace = diagonal + substitution_costs[b]
+            diagonal = up
+            up += indel_penalty
+            left += indel_penalty
+            if replace <= left and replace <= up:
+                left = replace
+                push_direction(DIAGONAL)
+            elif left <= up:
+                push_direction(LEFT)
+            else:
+                left = up
+                push_direction(UP)
+            push_cost(left)
+        cur[lo:hi + 1] = array(typecode, costs)
+        data[row + lo:row + hi + 1] = row_directions
+        prev, cur = cur, prev
+
+    return prev[m], directions
+
+
+def score(seq1: str, seq2: str, match_award=-3, indel_penalty=5, sub_penalty=1, banded_width=-1,
+          substitution: SubstitutionTable | None = None) -> float:
+    """
+    Alignment cost only: no back-pointers are kept.
+    Uses two rows of costs, or two band-wide buffers when banded.
+    """
+    n, m = len(seq1), len(seq2)
+    if banded_width != -1 and abs(n - m) > banded_width:
+        raise ValueError(f'banded_width={banded_width} does not reach the end of the alignment')
+
+    seq1, seq2, substitution, typecode, inf = prepare_scoring(seq1, seq2, match_award, indel_penalty,
+                                                              sub_penalty, substitution)
+    if banded_width == -1 or banded_width >= max(n, m):
+        return _score_rows(seq1, seq2, substitution, indel_penalty, typecode)
+    return _score_band(seq1, seq2, substitution, indel_penalty, banded_width, typecode, inf, None)[0]
+
+
+def _score_rows(seq1: bytes, seq2: bytes, substitution: SubstitutionTable, indel_penalty, typecode: str) -> float:
+    # Space: O(m) Time: O(n*m)
+    prev = array(typecode, [x * indel_penalty for x in range(len(seq2) + 1)])
+    for y in range(1, len(seq1) + 1):
+        substitution_costs = substitution[seq1[y - 1]]
+        left = y * indel_penalty
+        diagonal = prev[0]
+        costs = [left]
+        push_cost = costs.append
+        for b, up in zip(seq2, prev[1:]):
+            replace = diagonal + substitution_costs[b]
+            diagonal = up
+            up += indel_penalty
+            left += indel_penalty
+            if replace <= left and replace <= up:
+                left = replace
+            elif up < left:
+                left = up
+            push_cost(left)
+        prev = array(typecode, costs)
+    return prev[len(seq2)]
+
+
+def _score_band(seq1: bytes, seq2: bytes, substitution: SubstitutionTable, indel_penalty, band: int, typecode: str,
+                inf: float, pair: float | None) -> tuple[float, float]:
+    """
+    Cells are stored by their offset k = x - y + band from the diagonal,
+    so (x, y - 1) is at k + 1 of the previous row and (x - 1, y - 1) at k.
+    Given the cheapest cost of a pair of characters, also returns a lower bound on the cost of any
+    alignment that leaves the band (see _exit_bound).
+    """
+    # Space: O(k) Time: O(kn)
+    n, m = len(seq1), len(seq2)
+    width = 2 * band + 1
+    prev = array(typecode, [inf]) * (width + 1)
+    for x in range(min(m, band) + 1):
+        prev[band + x] = x * indel_penalty
+    exit_bound = inf if pair is None else _exit_bound(prev, 0, n, m, band, indel_penalty, pair)
+
+    for y in range(1, len(seq1) + 1):
+        cur = array(typecode, [inf]) * (width + 1)
+        start = max(0, band - y)
+        end = min(width - 1, m - y + band)
+        if y <= band:
+            cur[start] = y * indel_penalty
+            start += 1
+
+        substitution_costs = substitution[seq1[y - 1]]
+        left = cur[start - 1] if start > 0 else inf
+        costs = []
+        push_cost = costs.append
+        x = y + start - band
+        for b, diagonal, up in zip(seq2[x - 1:y + end - band], prev[start:end + 1], prev[start + 1:end + 2]):
+            replace = diagonal + substitution_costs[b]
+            up += indel_penalty
+            left += indel_penalty
+            if replace <= left and replace <= up:
+                left = replace
+            elif up < left:
+                left = up
+            push_cost(left)
+        cur[start:end + 1] = array(typecode, costs)
+        if pair is not None:
+            exit_bound = min(exit_bound, _exit_bound(cur, y, n, m, band, indel_penalty, pair))
+        prev = cur
+    return prev[m - n + band], exit_bound
+
+
+def _exit_bound(row: array, y: int, n: int, m: int, band: int, indel_penalty, pair) -> float:
+    """
+    Lower bound on alignments that first leave the band from row y: the banded cost of the edge cell,
+    one indel to step out, then the cheapest conceivable way to the end
+    (pairs of characters at `pair`, the best of any substitution or two indels, the rest indels).
+    """
+    bound = math.inf
+    x = y + band
+    if x < m:  # right edge, step left out of the band
+        rest_y, rest_x = n - y, m - x - 1
+        bound = row[2 * band] + indel_penalty + min(rest_x, rest_y) * pair + abs(rest_x - rest_y) * indel_penalty
+    x = y - band
+    if x >= 0 and y < n:  # left edge, step up out of the band
+        rest_y, rest_x = n - y - 1, m - x
+        bound = min(bound, row[0] + indel_penalty + min(rest_x, rest_y) * pair + abs(rest_x - rest_y) * indel_penalty)
+    return bound
+
+
+def adaptive_band_width(seq1: str, seq2: str, match_award=-3, indel_penalty=5, sub_penalty=1,
+                        initial_width=8, substitution: SubstitutionTable | None = None) -> int:
+    """
+    Start with a narrow band and double it until no alignment leaving the band can beat the banded cost.
+    Once the banded cost is strictly below that bound every optimal path stays inside the band,
+    so the banded alignment (tie-breaking included) is exactly the full alignment.
+    :return: the proven banded_width, or -1 if only the full table will do
+    """
+    n, m = len(seq1), len(seq2)
+    if indel_penalty < 0:
+        # more gaps are always cheaper, nothing outside the band can be ruled out
+        return -1
+
+    seq1, seq2, substitution, typecode, inf = prepare_scoring(seq1, seq2, match_award, indel_penalty,
+                                                              sub_penalty, substitution)
+    # a pair of characters costs at least the cheapest substitution or two indels
+    pair = min(cheapest(substitution), 2 * indel_penalty)
+    band = max(initial_width, abs(n - m), 1)
+    while band < max(n, m):  # Space: O(k) Time: O(kn) per attempt, the last attempt dominates
+        cost, exit_bound = _score_band(seq1, seq2, substitution, indel_penalty, band, typecode, inf, pair)
+        if cost < exit_bound:
+            return band
+        band *= 2
+    return -1
+
+
+def traceback(seq1: str, seq2: str, directions: DirectionMatrix, gap='-') -> tuple[str, str]:
+    """
+    Rebuild the alignment strings from the back-pointers of a filled table (see fill_directions),
+    so an alignment can be re-derived without recomputing the table.
+    Passing prefixes of the filled sequences traces back from that cell instead: back-pointers of a cell
+    only depend on the prefixes that end there, so this gives the alignment of the prefixes.
+    Characters are collected back to front and reversed once: O(n+m).
+    bytes sequences give bytes alignments.
+    """
+    gap, join = gap_and_join(seq1, gap)
+    aligned_sq1: list[str] = []
+    aligned_sq2: list[str] = []
+    data = directions.data
+    x = len(seq2)
+    y = len(seq1)
+    while x > 0 or y > 0:  # Space: O(n+m) Time: O(n+m)
+        direction = data[directions.offset(x, y)]
+        if direction == DIAGONAL:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(seq2[x - 1])
+            x -= 1
+            y -= 1
+        elif direction == LEFT:
+            aligned_sq1.append(gap)
+            aligned_sq2.append(seq2[x - 1])
+            x -= 1
+        else:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(gap)
+            y -= 1
+    aligned_sq1.reverse()
+    aligned_sq2.reverse()
+    return join(aligned_sq1), join(aligned_sq2)
+
+
+def prepare_scoring(seq1: str, seq2: str, match_award, indel_penalty, sub_penalty,
+                    substitution: SubstitutionTable | None) -> tuple[bytes, bytes, SubstitutionTable, str, float]:
+    """
+    Encode the sequences so each cell's substitution cost is a single read of the table,
+    and pick the array type that can hold the costs.
+    """
+    codes1, codes2 = encode_pair(seq1, seq2, relabel=substitution is None)
+    if substitution is None:
+        return codes1, codes2, uniform_table(match_award, sub_penalty), *_cost_type(
+            match_award, indel_penalty, sub_penalty)
+    if not has_integer_costs(substitution):
+        return codes1, codes2, substitution, 'd', math.inf
+    return codes1, codes2, substitution, *_cost_type(indel_penalty)
+
+
+def _cost_type(*costs) -> tuple[str, float]:
+    if all(isinstance(cost, int) for cost in costs):
+        return 'q', INT_INF
+    return 'd', math.inf
@@ -0,0 +1,141 @@
+import os
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import combinations, combinations_with_replacement, islice, permutations, product
+from pathlib import Path
+from time import time
+from typing import Iterable, Iterator
+
+from alignment import align
+from substitution import is_symmetric
+
+# Sequences shared with every worker process once, so chunks only carry indices
+_sequences: list[str] = []
+_align_kwargs: dict = {}
+
+
+def align_many(query: str, library: list[str], workers: int | None = None, chunk_size: int = 16,
+               **align_kwargs) -> Iterator[tuple[int, tuple[float, str | None, str | None]]]:
+    """
+    Align query against every sequence of the library across worker processes.
+    Yields (library index, align() result) in the order the chunks finish.
+    :param workers: number of worker processes; defaults to the number of CPUs, 1 aligns in this process
+    :param chunk_size: pairs sent to a worker at a time
+    :param align_kwargs: passed on to align()
+    """
+    sequences = [query, *library]
+    pairs = ((0, j) for j in range(1, len(sequences)))
+    for _, j, result in _run_pairs(sequences, pairs, workers, chunk_size, align_kwargs):
+        yield j - 1, result
+
+
+def iter_pairwise(sequences: list[str], workers: int | None = None, chunk_size: int = 64,
+                  **align_kwargs) -> Iterator[tuple[int, int, float]]:
+    """
+    Score every pair of distinct sequences across worker processes.
+    When the costs are symmetric (see symmetric_costs) only the pairs i < j are scored and the other half
+    of the matrix is never computed; otherwise both orders are.
+    Yields (i, j, cost) in the order the chunks finish.
+    """
+    indices = range(len(sequences))
+    pairs = combinations(indices, 2) if symmetric_costs(**align_kwargs) else permutations(indices, 2)
+    align_kwargs = {**align_kwargs, 'score_only': True}
+    for i, j, (cost, _, _) in _run_pairs(sequences, pairs, workers, chunk_size, align_kwargs):
+        yield i, j, cost
+
+
+def pairwise_matrix(sequences: list[str], workers: int | None = None, chunk_size: int = 64,
+                    **align_kwargs) -> list[list[float]]:
+    """
+    All-vs-all matrix of alignment costs. The diagonal holds the cost of aligning each sequence with itself.
+    """
+    symmetric = symmetric_costs(**align_kwargs)
+    indices = range(len(sequences))
+    pairs = combinations_with_replacement(indices, 2) if symmetric else product(indices, repeat=2)
+    matrix = [[0] * len(sequences) for _ in sequences]
+    align_kwargs = {**align_kwargs, 'score_only': True}
+    for i, j, (cost, _, _) in _run_pairs(sequences, pairs, workers, chunk_size, align_kwargs):
+        matrix[i][j] = cost
+        if symmetric:
+            matrix[j][i] = cost
+    return matrix
+
+
+def symmetric_costs(mode='global', substitution=None, **align_kwargs) -> bool:
+    """
+    Whether align(a, b) costs the same as align(b, a) with these parameters: global alignment with
+    match_award/sub_penalty or a symmetric substitution table. Other modes are not assumed symmetric:
+    semi-global aligns all of seq1, and x_drop prunes along seq1.
+    """
+    return mode == 'global' and (substitution is None or is_symmetric(substitution))
+
+
+def _run_pairs(sequences: list[str], pairs: Iterable[tuple[int, int]], workers: int | None, chunk_size: int,
+               align_kwargs: dict) -> Iterator[tuple[int, int, tuple]]:
+    if workers == 1:
+        _init_worker(sequences, align_kwargs)
+        for i, j in pairs:
+            yield i, j, _align_pair(i, j)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(sequences, align_kwargs)) as pool:
+        pairs = iter(pairs)
+        futures = set()
+        # keep a bounded number of chunks in flight so huge pair lists aren't submitted all at once
+        in_flight = 4 * (workers or os.cpu_count() or 1)
+        while True:
+            while len(futures) < in_flight and (chunk := list(islice(pairs, chunk_size))):
+                futures.add(pool.submit(_align_chunk, chunk))
+            if not futures:
+                break
+            # every chunk that finished is yielded and replaced before waiting again
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def _init_worker(sequences: list[str], align_kwargs: dict):
+    global _sequences, _align_kwargs
+    _sequences = sequences
+    _align_kwargs = align_kwargs
+
+
+def _align_pair(i: int, j: int) -> tuple:
+    return align(_sequences[i], _sequences[j], **_align_kwargs)
+
+
+def _align_chunk(chunk: list[tuple[int, int]]) -> list[tuple[int, int, tuple]]:
+    return [(i, j, _align_pair(i, j)) for i, j in chunk]
+
+
+def main(count: int, length: int, banded_width: int, engine: str, max_workers: int):
+    """
+    Print all-vs-all throughput for windows of the bovine and murine genomes at increasing worker counts
+    """
+    test_files = Path(__file__).parent / 'test_files'
+    genomes = [''.join((test_files / name).read_text().splitlines())
+               for name in ('bovine_coronavirus.txt', 'murine_hepatitus.txt')]
+    sequences = [genomes[i % 2][(i // 2) * length:(i // 2 + 1) * length] for i in range(count)]
+    pairs = count * (count - 1) // 2
+
+    print(f'{pairs} pairs of length {length}')
+    workers = 1
+    while workers <= max_workers:
+        start = time()
+        for _ in iter_pairwise(sequences, workers, banded_width=banded_width, engine=engine):
+            pass
+        seconds = time() - start
+        print(f'{workers:>3} workers: {seconds:8.3f} s {pairs / seconds:10.1f} pairs/s')
+        workers *= 2
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='All-vs-all alignment throughput')
+    parser.add_argument('--count', type=int, default=24, help='number of sequences')
+    parser.add_argument('--length', type=int, default=300, help='length of each sequence')
+    parser.add_argument('--banded-width', type=int, default=-1)
+    parser.add_argument('--engine', default='array')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    main(args.count, args.length, args.banded_width, args.engine, args.max_workers)
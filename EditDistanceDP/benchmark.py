@@ -0,0 +1,212 @@
+import json
+import platform
+import random
+import resource
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+
+from alignment import align
+from seeded import align_seeded
+from seq_io import read_sequence
+
+TEST_FILES = Path(__file__).parent / 'test_files'
+
+BAND = 100
+
+# case name -> keyword arguments of align(); 'seeded' runs seeded.align_seeded instead
+CASES = {
+    'table': {'engine': 'table'},
+    'table-banded': {'engine': 'table', 'banded_width': BAND},
+    'array': {'engine': 'array'},
+    'array-banded': {'engine': 'array', 'banded_width': BAND},
+    'numpy': {'engine': 'numpy'},
+    'numpy-banded': {'engine': 'numpy', 'banded_width': BAND},
+    'hirschberg': {'engine': 'hirschberg'},
+    'hirschberg-banded': {'engine': 'hirschberg', 'banded_width': BAND},
+    'wavefront': {'engine': 'wavefront'},
+    'wavefront-banded': {'engine': 'wavefront', 'banded_width': BAND},
+    'score-only': {'engine': 'array', 'score_only': True},
+    'adaptive': {'engine': 'array', 'adaptive_band': True},
+    'affine': {'engine': 'array', 'gap_open': 10},
+    'local': {'engine': 'array', 'mode': 'local'},
+    'semi-global-x-drop': {'engine': 'array', 'mode': 'semi-global', 'x_drop': 60},
+    'edit-distance': {'match_award': 0, 'indel_penalty': 1, 'sub_penalty': 1, 'score_only': True},
+    'seeded': {'seeded': True},
+}
+
+# the table engine keeps a Score object per cell; larger inputs take minutes
+TABLE_SIZE_LIMIT = 1000
+
+
+def make_inputs(source: str, size: int) -> tuple[str, str]:
+    """
+    'genomes' gives prefixes of the bovine and murine test genomes.
+    'synthetic-<divergence>' gives a random sequence and a copy where that fraction of the positions
+    is mutated: four in five substituted, the rest deleted or followed by an insertion. Inputs are seeded,
+    so every run sees the same sequences.
+    """
+    if source == 'genomes':
+        return (read_sequence(TEST_FILES / 'bovine_coronavirus.txt')[:size].decode(),
+                read_sequence(TEST_FILES / 'murine_hepatitus.txt')[:size].decode())
+
+    divergence = float(source.removeprefix('synthetic-'))
+    rng = random.Random(f'{size}-{divergence}')
+    seq1 = ''.join(rng.choices('acgt', k=size))
+    seq2 = []
+    for c in seq1:
+        r = rng.random()
+        if r >= divergence:
+            seq2.append(c)
+        elif r < 0.8 * divergence:
+            seq2.append(rng.choice('acgt'.replace(c, '')))
+        elif r < 0.9 * divergence:
+            seq2.append(c + rng.choice('acgt'))
+    return seq1, ''.join(seq2)
+
+
+def run_case(case: str, source: str, size: int, repeat=3, trace=False) -> dict:
+    """
+    Time one case on one input and return its record; the best of `repeat` runs is kept.
+    peak_rss_kb is the high-water mark of the whole process, so run each case in a fresh process (see run).
+    """
+    seq1, seq2 = make_inputs(source, size)
+    kwargs = dict(CASES[case])
+    band = kwargs.get('banded_width', -1)
+    record = {'case': case, 'input': source, 'size1': len(seq1), 'size2': len(seq2), 'band': band}
+    seconds = []
+    try:
+        for _ in range(repeat):
+            start = perf_counter()
+            score = _align(seq1, seq2, kwargs)
+            seconds.append(perf_counter() - start)
+    except ValueError as error:
+        # e.g. the band doesn't reach the end, or x_drop abandoned every alignment
+        return {**record, 'error': str(error)}
+
+    peak_traced_kb = None
+    if trace:
+        # tracing slows allocation-heavy engines many times over, so it gets a run of its own
+        tracemalloc.start()
+        _align(seq1, seq2, kwargs)
+        peak_traced_kb = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+
+    # banded cases are measured in the cells inside the band, all others in the cells of the full table
+    cells = len(seq1) * len(seq2) if band == -1 else len(seq1) * (2 * band + 1)
+    return {
+        **record,
+        'score': score,
+        'seconds': min(seconds),
+        'cells': cells,
+        'cells_per_second': cells / min(seconds),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'peak_traced_kb': peak_traced_kb,
+    }
+
+
+def run(cases: list[str], sources: list[str], sizes: list[int], repeat=3, trace=False, isolate=True) -> dict:
+    """
+    Run every case on every input and size; table cases skip sizes above TABLE_SIZE_LIMIT.
+    With isolate, each case runs in a freshly spawned process so its peak RSS is its own.
+    """
+    results = []
+    for source in sources:
+        for size in sizes:
+            for case in cases:
+                if case.startswith('table') and size > TABLE_SIZE_LIMIT:
+                    continue
+                if isolate:
+                    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+                        record = pool.submit(run_case, case, source, size, repeat, trace).result()
+                else:
+                    record = run_case(case, source, size, repeat, trace)
+                print(_format_record(record), flush=True)
+                results.append(record)
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'machine': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold=0.1) -> list[str]:
+    """
+    Report every case that got slower or used more memory by more than threshold (a fraction),
+    or whose score changed. Cases missing from either run are ignored.
+    :return: one line per regression
+    """
+    def key(record):
+        return record['case'], record['input'], record['size1'], record['size2']
+
+    before = {key(record): record for record in baseline['results']}
+    regressions = []
+    for record in current['results']:
+        old = before.get(key(record))
+        if old is None:
+            continue
+        name = f'{record["case"]} on {record["input"]} ({record["size1"]}x{record["size2"]})'
+        if 'error' in record or 'error' in old:
+            if record.get('error') != old.get('error'):
+                regressions.append(f'{name}: error changed from {old.get("error")} to {record.get("error")}')
+            continue
+        if record['score'] != old['score']:
+            regressions.append(f'{name}: score changed from {old["score"]} to {record["score"]}')
+        for field, unit in (('seconds', 's'), ('peak_rss_kb', ' kB'), ('peak_traced_kb', ' kB')):
+            if old[field] and record[field] and record[field] > old[field] * (1 + threshold):
+                regressions.append(f'{name}: {field} {old[field]:.6g}{unit} -> {record[field]:.6g}{unit} '
+                                   f'(+{record[field] / old[field] - 1:.0%})')
+    return regressions
+
+
+def _align(seq1: str, seq2: str, kwargs: dict) -> float:
+    if kwargs.get('seeded'):
+        return align_seeded(seq1, seq2, mode='global')[0]
+    return align(seq1, seq2, **kwargs)[0]
+
+
+def _format_record(record: dict) -> str:
+    if 'error' in record:
+        return f'{record["case"]:>20} {record["input"]:>15} {record["size1"]:>6} failed: {record["error"]}'
+    traced = '' if record['peak_traced_kb'] is None else f'{record["peak_traced_kb"]:>10}'
+    return (f'{record["case"]:>20} {record["input"]:>15} {record["size1"]:>6} {record["score"]:>8} '
+            f'{record["seconds"]:>8.3f} {record["cells_per_second"] / 1e6:>9.2f} {record["peak_rss_kb"]:>10}{traced}')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Benchmark the alignment engines and modes, and compare runs')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks and write the results as JSON')
+    run_parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    run_parser.add_argument('--inputs', nargs='+', default=['genomes', 'synthetic-0.01', 'synthetic-0.1',
+                                                           'synthetic-0.3'])
+    run_parser.add_argument('--sizes', nargs='+', type=int, default=[500, 1000, 3000])
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--tracemalloc', action='store_true', help='also record peak traced memory')
+    run_parser.add_argument('--no-isolate', action='store_true', help='run every case in this process')
+    run_parser.add_argument('--output', type=Path, default=Path('benchmark.json'))
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two result files')
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='allowed slowdown, 0.1 is 10%%')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        print(f'{"case":>20} {"input":>15} {"size":>6} {"score":>8} {"seconds":>8} {"Mcells/s":>9} '
+              f'{"peak RSS kB":>10}{" traced kB" if args.tracemalloc else ""}')
+        report = run(args.cases, args.inputs, args.sizes, args.repeat, args.tracemalloc, not args.no_isolate)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f'wrote {args.output}')
+    else:
+        regressions = compare(json.loads(args.baseline.read_text()), json.loads(args.current.read_text()),
+                              args.threshold)
+        print('\n'.join(regressions) or 'no regressions')
+        sys.exit(1 if regressions else 0)
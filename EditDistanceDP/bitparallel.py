@@ -0,0 +1,66 @@
+def edit_distance(seq1: str, seq2: str, max_distance: int | None = None) -> int | None:
+    """
+    Unit-cost edit distance (Levenshtein) with Myers' bit-parallel algorithm in Hyyrö's formulation.
+    One column of the table is held as vertical +1/-1 difference bit vectors in Python ints, so each
+    character of the longer sequence costs a handful of big int operations: O(n*m/w) time for w-bit words.
+
+    :param max_distance: when given, return None as soon as the distance is known to exceed it;
+        the distance can fall by at most one per remaining character, so hopeless pairs stop early
+    :return: the edit distance, or None if it is above max_distance
+    """
+    if len(seq1) > len(seq2):
+        seq1, seq2 = seq2, seq1
+    m, n = len(seq1), len(seq2)
+    if max_distance is not None and n - m > max_distance:
+        return None
+    if seq1 == seq2:
+        return 0
+    if m == 0:
+        return n if max_distance is None or n <= max_distance else None
+
+    # bit i of peq[c] is set when seq1[i] == c
+    peq: dict = {}
+    for i, c in enumerate(seq1):
+        peq[c] = peq.get(c, 0) | 1 << i
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+
+    positive, negative = mask, 0
+    distance = m
+    remaining = n
+    for c in seq2:  # Space: O(m) Time: O(n*m/w)
+        match = peq.get(c, 0)
+        vertical = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        horizontal_positive = negative | ~(horizontal | positive) & mask
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+        remaining -= 1
+        if max_distance is not None and distance - remaining > max_distance:
+            return None
+        # the top row of a global alignment grows by one per column, so a +1 is shifted in
+        horizontal_positive = (horizontal_positive << 1 | 1) & mask
+        horizontal_negative = (horizontal_negative << 1) & mask
+        positive = horizontal_negative | ~(vertical | horizontal_positive) & mask
+        negative = horizontal_positive & vertical
+
+    if max_distance is not None and distance > max_distance:
+        return None
+    return distance
+
+
+def within_distance(seq1: str, seq2: str, k: int) -> bool:
+    """
+    Whether the edit distance of the sequences is at most k, stopping as soon as it can't be.
+    """
+    return edit_distance(seq1, seq2, k) is not None
+
+
+def is_unit_cost(match_award, indel_penalty, sub_penalty) -> bool:
+    """
+    Whether align() with these costs scores the edit distance times indel_penalty.
+    """
+    return indel_penalty == sub_penalty > 0 and min(match_award, sub_penalty) == 0
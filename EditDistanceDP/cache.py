@@ -0,0 +1,149 @@
+import hashlib
+import inspect
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from alignment import align
+
+CacheInfo = namedtuple('CacheInfo', 'hits disk_hits misses evictions size max_entries')
+
+# Every engine gives the same result, so the engine is left out of the key
+_IGNORED_PARAMETERS = ('seq1', 'seq2', 'engine', 'score_only')
+
+
+class AlignmentCache:
+    """
+    Memoizes align() on content hashes of both sequences and the scoring parameters.
+    Recent results are kept in a bounded in-memory LRU; with a path, every result is also written to
+    a sqlite database (alignments zlib-compressed) that outlives the process and is shared by every cache
+    opened on it. A full result also answers score_only calls for the same pair.
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=1024, path: str | Path | None = None):
+        self.max_entries = max_entries
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS results '
+                             '(key TEXT PRIMARY KEY, cost, aligned1 BLOB, aligned2 BLOB)')
+
+    def align(self, seq1: str, seq2: str, **align_kwargs) -> tuple[float, str | None, str | None]:
+        """
+        align(seq1, seq2, **align_kwargs), from the cache when this pair was aligned with the same parameters
+        """
+        key = result_key(seq1, seq2, **align_kwargs)
+        score_only = align_kwargs.get('score_only', False)
+        with self._lock:
+            result = self._get(key, score_only)
+        if result is not None:
+            return (result[0], None, None) if score_only else result
+
+        result = align(seq1, seq2, **align_kwargs)
+        with self._lock:
+            self.misses += 1
+            self._put(key, result)
+            if self._db is not None:
+                self._store(key, result)
+        return result
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.disk_hits, self.misses, self.evictions, len(self._entries),
+                             self.max_entries)
+
+    def clear(self):
+        """
+        Empty both tiers and reset the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM results')
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get(self, key: str, score_only: bool) -> tuple | None:
+        result = self._entries.get(key)
+        if result is not None and (score_only or result[1] is not None):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+        result = self._load(key) if self._db is not None else None
+        if result is not None and (score_only or result[1] is not None):
+            self._put(key, result)
+            self.disk_hits += 1
+            return result
+        return None
+
+    def _put(self, key: str, result: tuple):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key: str) -> tuple | None:
+        row = self._db.execute('SELECT cost, aligned1, aligned2 FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        cost, aligned1, aligned2 = row
+        if aligned1 is None:
+            return cost, None, None
+        aligned1, aligned2 = zlib.decompress(aligned1), zlib.decompress(aligned2)
+        if key.startswith('str:'):
+            aligned1, aligned2 = aligned1.decode(), aligned2.decode()
+        return cost, aligned1, aligned2
+
+    def _store(self, key: str, result: tuple):
+        cost, aligned1, aligned2 = result
+        if aligned1 is not None:
+            if isinstance(aligned1, str):
+                aligned1, aligned2 = aligned1.encode(), aligned2.encode()
+            aligned1, aligned2 = zlib.compress(aligned1), zlib.compress(aligned2)
+        with self._db:
+            self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', (key, cost, aligned1, aligned2))
+
+
+def result_key(seq1: str, seq2: str, **align_kwargs) -> str:
+    """
+    The cache key of an align() call: whether the sequences are str or bytes (the alignments are the same type),
+    then a SHA-256 digest of both sequences and every scoring parameter, defaults filled in.
+    """
+    bound = inspect.signature(align).bind(seq1, seq2, **align_kwargs)
+    bound.apply_defaults()
+    digest = hashlib.sha256()
+    for seq in (seq1, seq2):
+        data = seq.encode() if isinstance(seq, str) else bytes(seq)
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    for name, value in bound.arguments.items():
+        if name in _IGNORED_PARAMETERS:
+            continue
+        if name == 'substitution' and value is not None:
+            value = _table_digest(value)
+        digest.update(f'{name}={value!r};'.encode())
+    return f'{"str" if isinstance(seq1, str) else "bytes"}:{digest.hexdigest()}'
+
+
+@lru_cache(maxsize=32)
+def _table_digest(table: tuple) -> str:
+    return hashlib.sha256(repr(table).encode()).hexdigest()
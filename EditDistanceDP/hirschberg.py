@@ -0,0 +1,186 @@
+import math
+
+from seq_io import gap_and_join
+from substitution import SubstitutionTable, encode_pair, uniform_table
+
+# Blocks with at most this many cells are solved with a full (small) table
+BLOCK_CELLS = 1 << 12
+
+DIAGONAL, LEFT, UP = 1, 2, 3
+
+
+def align_linear_memory(
+        seq1: str,
+        seq2: str,
+        match_award=-3,
+        indel_penalty=5,
+        sub_penalty=1,
+        banded_width=-1,
+        gap='-',
+        substitution: SubstitutionTable | None = None
+) -> tuple[float, str | None, str | None]:
+    """
+        Align seq1 against seq2 using a Hirschberg-style divide and conquer in O(n+m) memory.
+        Produces the same cost and alignment strings as the table version of align(),
+        including its diagonal/left/up tie-breaking.
+
+        Each forward pass over a block also carries, for every cell below the split row,
+        the column where its traceback leaves the split row. That crossing cell lies on the
+        traceback path of the whole table, so the two halves can be solved independently.
+
+        :param seq1: the first sequence to align; should be on the "left" of the matrix
+        :param seq2: the second sequence to align; should be on the "top" of the matrix
+        :param match_award: how many points to award a match
+        :param indel_penalty: how many points to award a gap in either sequence
+        :param sub_penalty: how many points to award a substitution
+        :param banded_width: banded_width * 2 + 1 is the width of the banded alignment; -1 indicates full alignment
+        :param gap: the character to use to represent gaps in the alignment strings
+        :param substitution: table of substitution costs by byte, replacing match_award and sub_penalty
+        :return: alignment cost, alignment 1, alignment 2
+    """
+    codes = encode_pair(seq1, seq2, relabel=substitution is None)
+    costs = (substitution or uniform_table(match_award, sub_penalty), indel_penalty)
+    band = banded_width if banded_width != -1 else max(len(seq1), len(seq2))
+    if abs(len(seq1) - len(seq2)) > band:
+        raise ValueError(f'banded_width={banded_width} does not reach the end of the alignment')
+
+    gap, join = gap_and_join(seq1, gap)
+    aligned_sq1: list[str] = []
+    aligned_sq2: list[str] = []
+    cost = _divide(seq1, seq2, codes, 0, len(seq1), 0, len(seq2), costs, band, gap, aligned_sq1, aligned_sq2)
+    return cost, join(aligned_sq1), join(aligned_sq2)
+
+
+def _divide(seq1: str, seq2: str, codes: tuple[bytes, bytes], y0: int, y1: int, x0: int, x1: int,
+            costs: tuple[SubstitutionTable, int], band: int, gap: str, aligned_sq1: list[str],
+            aligned_sq2: list[str]) -> float:
+    # Space: O(m) Time: O(n*m) (O(kn log n) when banded)
+    if y1 - y0 <= 1 or (y1 - y0 + 1) * (x1 - x0 + 1) <= BLOCK_CELLS:
+        return _align_block(seq1, seq2, codes, y0, y1, x0, x1, costs, band, gap, aligned_sq1, aligned_sq2)
+
+    split = (y0 + y1) // 2
+    cost, crossing = _forward_pass(*codes, y0, y1, x0, x1, split, costs, band)
+    _divide(seq1, seq2, codes, y0, split, x0, crossing, costs, band, gap, aligned_sq1, aligned_sq2)
+    _divide(seq1, seq2, codes, split, y1, crossing, x1, costs, band, gap, aligned_sq1, aligned_sq2)
+    return cost
+
+
+def _forward_pass(seq1: bytes, seq2: bytes, y0: int, y1: int, x0: int, x1: int, split: int,
+                  costs: tuple[SubstitutionTable, int], band: int) -> tuple[float, int]:
+    """
+    Fill the block (y0, x0)..(y1, x1) keeping only two rows.
+    Returns the cost of (y1, x1) and the column where its traceback leaves row `split`.
+    """
+    substitution, indel_penalty = costs
+    inf = math.inf
+    width = x1 - x0
+
+    # one spare column so the cell just right of the band can always be read as infinity
+    prev = [inf] * (width + 2)
+    cur = [inf] * (width + 2)
+    for j in range(min(width, y0 + band - x0) + 1):
+        prev[j] = j * indel_penalty
+    prev_crossing = list(range(x0, x1 + 2))
+    cur_crossing = list(range(x0, x1 + 2))
+
+    for y in range(y0 + 1, y1 + 1):
+        lo = max(x0 + 1, y - band)
+        hi = min(x1, y + band)
+        if lo - 1 == x0:
+            cur[0] = (y - y0) * indel_penalty if y - x0 <= band else inf
+        else:
+            cur[lo - 1 - x0] = inf
+        if y == split + 1:
+            # the row above is the split row: every cell crosses it at its own column
+            prev_crossing = list(range(x0, x1 + 2))
+
+        substitution_costs = substitution[seq1[y - 1]]
+        left = cur[lo - 1 - x0]
+        if y <= split:
+            for j, b in zip(range(lo - x0, hi - x0 + 1), seq2[lo - 1:hi]):
+                diagonal = prev[j - 1] + substitution_costs[b]
+                left += indel_penalty
+                up = prev[j] + indel_penalty
+                if diagonal <= left and diagonal <= up:
+                    left = diagonal
+                elif up < left:
+                    left = up
+                cur[j] = left
+        else:
+            cur_crossing[lo - 1 - x0] = prev_crossing[lo - 1 - x0]
+            for j, b in zip(range(lo - x0, hi - x0 + 1), seq2[lo - 1:hi]):
+                diagonal = prev[j - 1] + substitution_costs[b]
+                left += indel_penalty
+                up = prev[j] + indel_penalty
+                if diagonal <= left and diagonal <= up:
+                    left = diagonal
+                    cur_crossing[j] = prev_crossing[j - 1]
+                elif left <= up:
+                    cur_crossing[j] = cur_crossing[j - 1]
+                else:
+                    left = up
+                    cur_crossing[j] = prev_crossing[j]
+                cur[j] = left
+            prev_crossing, cur_crossing = cur_crossing, prev_crossing
+        prev, cur = cur, prev
+
+    return prev[width], prev_crossing[width]
+
+
+def _align_block(seq1: str, seq2: str, codes: tuple[bytes, bytes], y0: int, y1: int, x0: int, x1: int,
+                 costs: tuple[SubstitutionTable, int], band: int, gap: str, aligned_sq1: list[str],
+                 aligned_sq2: list[str]) -> float:
+    """
+    Align a small block with a full table and append its alignment to the output pieces.
+    """
+    substitution, indel_penalty = costs
+    codes1, codes2 = codes
+    inf = math.inf
+    width = x1 - x0
+    values = [[inf] * (width + 1) for _ in range(y1 - y0 + 1)]
+    directions = [[UP] * (width + 1) for _ in range(y1 - y0 + 1)]
+
+    for j in range(min(width, y0 + band - x0) + 1):
+        values[0][j] = j * indel_penalty
+        directions[0][j] = LEFT
+    for i in range(min(y1 - y0, x0 + band - y0) + 1):
+        values[i][0] = i * indel_penalty
+
+    for i in range(1, y1 - y0 + 1):
+        y = y0 + i
+        row, above = values[i], values[i - 1]
+        for x in range(max(x0 + 1, y - band), min(x1, y + band) + 1):
+            j = x - x0
+            diagonal = above[j - 1] + substitution[codes1[y - 1]][codes2[x - 1]]
+            left = row[j - 1] + indel_penalty
+            up = above[j] + indel_penalty
+            if diagonal <= left and diagonal <= up:
+                row[j] = diagonal
+                directions[i][j] = DIAGONAL
+            elif left <= up:
+                row[j] = left
+                directions[i][j] = LEFT
+            else:
+                row[j] = up
+
+    block_sq1: list[str] = []
+    block_sq2: list[str] = []
+    i, j = y1 - y0, width
+    while i > 0 or j > 0:
+        direction = directions[i][j] if i > 0 else LEFT
+        if direction == DIAGONAL:
+            block_sq1.append(seq1[y0 + i - 1])
+            block_sq2.append(seq2[x0 + j - 1])
+            i -= 1
+            j -= 1
+        elif direction == LEFT:
+            block_sq1.append(gap)
+            block_sq2.append(seq2[x0 + j - 1])
+            j -= 1
+        else:
+            block_sq1.append(seq1[y0 + i - 1])
+            block_sq2.append(gap)
+            i -= 1
+    aligned_sq1.extend(reversed(block_sq1))
+    aligned_sq2.extend(reversed(block_sq2))
+    return values[y1 - y0][width]
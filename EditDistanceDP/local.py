@@ -0,0 +1,159 @@
+import math
+
+from array_engine import DIAGONAL, LEFT, UP, prepare_scoring
+from seq_io import gap_and_join
+from substitution import SubstitutionTable
+
+# Back-pointer of a cell where the alignment starts (free leading gaps or a fresh local alignment)
+START = 0
+
+MODES = ('local', 'semi-global')
+
+
+def align_local(
+        seq1: str,
+        seq2: str,
+        match_award=-3,
+        indel_penalty=5,
+        sub_penalty=1,
+        gap='-',
+        mode='local',
+        x_drop=None,
+        substitution: SubstitutionTable | None = None,
+        score_only=False
+) -> tuple[float, str | None, str | None, tuple[int, int], tuple[int, int]]:
+    """
+        Align part of seq1 against part of seq2.
+        'local' (Smith-Waterman) finds the cheapest pair of substrings; any cell may start a new alignment at cost 0.
+        'semi-global' aligns all of seq1 (a query) against the cheapest substring of seq2 (e.g. a genome):
+        gaps before and after the query in seq2 are free.
+
+        With x_drop, a cell costing more than x_drop above the cheapest cell of the rows filled so far is abandoned,
+        so each row is only filled across the columns that are still alive. Once local alignments can no longer
+        restart at cost 0 and every cell of a row is abandoned, the fill stops. This is a heuristic:
+        an alignment that only pays off after a stretch worse than x_drop is lost.
+
+        Other parameters are the same as align().
+        :return: alignment cost, alignment 1, alignment 2, and the [start, end) spans of seq1 and seq2 they cover
+    """
+    if mode not in MODES:
+        raise ValueError(f'Unknown alignment mode: {mode}')
+    codes1, codes2, substitution, _, inf = prepare_scoring(seq1, seq2, match_award, indel_penalty, sub_penalty,
+                                                           substitution)
+    cost, (x, y), rows = _fill(codes1, codes2, substitution, indel_penalty, mode == 'local', x_drop, inf,
+                               keep_directions=not score_only)
+    if score_only:
+        return cost, None, None, (y, y), (x, x)
+
+    gap, join = gap_and_join(seq1, gap)
+    aligned_sq1: list[str] = []
+    aligned_sq2: list[str] = []
+    end1, end2 = y, x
+    while True:  # Space: O(n+m) Time: O(n+m)
+        lo, codes = rows[y]
+        direction = codes[x - lo]
+        if direction == START:
+            break
+        if direction == DIAGONAL:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(seq2[x - 1])
+            x -= 1
+            y -= 1
+        elif direction == LEFT:
+            aligned_sq1.append(gap)
+            aligned_sq2.append(seq2[x - 1])
+            x -= 1
+        else:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(gap)
+            y -= 1
+    aligned_sq1.reverse()
+    aligned_sq2.reverse()
+    return cost, join(aligned_sq1), join(aligned_sq2), (y, end1), (x, end2)
+
+
+def _fill(seq1: bytes, seq2: bytes, substitution: SubstitutionTable, indel_penalty, local: bool, x_drop,
+          inf: float, keep_directions: bool) -> tuple[float, tuple[int, int], list[tuple[int, bytes]] | None]:
+    """
+    Returns the cost and end cell (x, y) of the alignment, and for every filled row its first column and
+    the back-pointers of the columns filled from there.
+    """
+    n, m = len(seq1), len(seq2)
+    # row 0 is free in both modes: the alignment may start anywhere in seq2
+    prev = [0] * (m + 1) + [inf]
+    cur = [inf] * (m + 2)
+    lo, hi = 0, m  # live columns of the previous row
+    best, end = 0, (0, 0)
+    rows = [(0, bytes(m + 1))] if keep_directions else None
+    for y in range(1, n + 1):  # Space: O(m) plus the filled cells Time: O(filled cells)
+        limit = math.inf if x_drop is None else best + x_drop
+        # limit only shrinks, so the row above a fresh row was filled completely
+        fresh = local and limit >= 0
+        if fresh:
+            lo, hi = 0, m
+        values = []
+        directions = bytearray()
+
+        if lo == 0:
+            left, code = prev[0] + indel_penalty, UP
+            if fresh:
+                left, code = 0, START
+            elif left > limit:
+                left = inf
+            values.append(left)
+            directions.append(code)
+        else:
+            left = inf
+        first = max(lo, 1)
+        stop = min(hi + 1, m)
+
+        substitution_costs = substitution[seq1[y - 1]]
+        diagonal_prev = prev[first - 1]
+        for b, up_prev in zip(seq2[first - 1:stop], prev[first:stop + 1]):
+            diagonal = diagonal_prev + substitution_costs[b]
+            left += indel_penalty
+            up = up_prev + indel_penalty
+            if diagonal <= left and diagonal <= up:
+                left, code = diagonal, DIAGONAL
+            elif up < left:
+                left, code = up, UP
+            else:
+                code = LEFT
+            if fresh and left >= 0:
+                left, code = 0, START
+            elif left > limit:
+                left = inf
+            values.append(left)
+            directions.append(code)
+            diagonal_prev = up_prev
+
+        # past the live columns of the row above only gaps in seq1 can continue the alignment
+        for _ in range(stop, m):
+            left += indel_penalty
+            if left > limit:
+                break
+            values.append(left)
+            directions.append(LEFT)
+
+        row_lo = min(lo, first)
+        alive = [i for i, value in enumerate(values) if value <= limit]
+        if not alive:
+            if local:
+                break
+            raise ValueError(f'x_drop={x_drop} abandoned every alignment before the end of seq1')
+        cur[row_lo:row_lo + len(values)] = values
+        if row_lo > 0:
+            cur[row_lo - 1] = inf
+        cur[row_lo + len(values)] = inf
+        lo, hi = row_lo + alive[0], row_lo + alive[-1]
+        if keep_directions:
+            rows.append((row_lo, bytes(directions)))
+
+        row_best = min(values)
+        if local and row_best < best or not local and y == n:
+            best, end = row_best, (row_lo + values.index(row_best), y)
+        elif not local and row_best < best:
+            best = row_best
+        prev, cur = cur, prev
+
+    return best, end, rows
@@ -1,34 +1,38 @@
 from argparse import ArgumentParser
 from pathlib import Path
 
-from alignment import align
+from alignment import align, ENGINES
+from seq_io import read_sequence
 
 
-def main(seq1: str, seq2: str):
+def main(seq1: bytes, seq2: bytes, engine: str = 'table'):
     """
     Align the two sequences and print the score and alignment strings
     """
-    score, alignment1, alignment2 = align(seq1, seq2)
+    score, alignment1, alignment2 = align(seq1, seq2, engine=engine)
     print(f'Score: {score}')
-    print(alignment1)
-    print(alignment2)
+    print(alignment1.decode())
+    print(alignment2.decode())
 
 
-def _content_or_string(could_be_path):
+def _content_or_string(could_be_path) -> bytes:
     if (s1file := Path(could_be_path)).exists():
-        return s1file.read_text()
+        # plain text or the first record of a FASTA file, newlines stripped
+        return read_sequence(s1file)
     else:
         # assume it's the sequence string, not a file name
-        return could_be_path
+        return could_be_path.encode()
 
 
 if __name__ == '__main__':
     parser = ArgumentParser()
     parser.add_argument('seq1_file', help='Path to file containing sequence 1')
     parser.add_argument('seq2_file', help='Path to file containing sequence 2')
+    parser.add_argument('--engine', default='table', choices=ENGINES,
+                        help='Alignment engine; all but table avoid the table of Score objects')
     args = parser.parse_args()
 
     seq1 = _content_or_string(args.seq1_file)
     seq2 = _content_or_string(args.seq2_file)
 
-    main(seq1, seq2)
+    main(seq1, seq2, args.engine)
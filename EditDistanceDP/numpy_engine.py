@@ -0,0 +1,136 @@
+import numpy as np
+
+from array_engine import DIAGONAL, LEFT, UP, INT_INF, DirectionMatrix, traceback
+from substitution import SubstitutionTable, encode_pair, per_table
+
+
+def align_numpy(
+        seq1: str,
+        seq2: str,
+        match_award=-3,
+        indel_penalty=5,
+        sub_penalty=1,
+        banded_width=-1,
+        gap='-',
+        substitution: SubstitutionTable | None = None
+) -> tuple[float, str | None, str | None]:
+    """
+        Align seq1 against seq2 filling one anti-diagonal of the table at a time with NumPy.
+        Cells on an anti-diagonal only depend on the previous two, so each one is a handful of vector operations.
+        Gives the same cost and alignment strings as the table version of align().
+        Parameters are the same as align().
+        :return: alignment cost, alignment 1, alignment 2
+    """
+    cost, directions = fill_directions_numpy(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width,
+                                             substitution)
+    aligned_sq1, aligned_sq2 = traceback(seq1, seq2, directions, gap)
+    return cost, aligned_sq1, aligned_sq2
+
+
+def fill_directions_numpy(seq1: str, seq2: str, match_award=-3, indel_penalty=5, sub_penalty=1,
+                          banded_width=-1, substitution: SubstitutionTable | None = None
+                          ) -> tuple[float, DirectionMatrix]:
+    """
+    Fill the alignment table by anti-diagonals.
+    Returns the alignment cost and the back-pointer of every cell.
+    """
+    return _fill_anti_diagonals(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, substitution,
+                                True)
+
+
+def score_numpy(seq1: str, seq2: str, match_award=-3, indel_penalty=5, sub_penalty=1, banded_width=-1,
+                substitution: SubstitutionTable | None = None) -> float:
+    """
+    Alignment cost only: no back-pointers are kept, so memory is the last three anti-diagonals.
+    """
+    return _fill_anti_diagonals(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, substitution,
+                                False)[0]
+
+
+def _fill_anti_diagonals(seq1: str, seq2: str, match_award, indel_penalty, sub_penalty, banded_width,
+                         substitution: SubstitutionTable | None,
+                         keep_directions: bool) -> tuple[float, DirectionMatrix | None]:
+    """
+    Fill the alignment table by anti-diagonals (x + y = d) keeping only the last three.
+    Diagonals are indexed by y.
+    """
+    n, m = len(seq1), len(seq2)
+    band = banded_width if banded_width != -1 else max(n, m)
+    if abs(n - m) > band:
+        raise ValueError(f'banded_width={banded_width} does not reach the end of the alignment')
+
+    # fill_table also tries a substitution on matching characters, so a match costs the smaller of the two
+    match_cost = min(match_award, sub_penalty)
+    if substitution is None:
+        table = None
+        codes1, codes2 = _encode(seq1), _encode(seq2)
+        integral = all(isinstance(cost, int) for cost in (match_award, indel_penalty, sub_penalty))
+    else:
+        table = _as_array(substitution)
+        codes1, codes2 = (np.frombuffer(codes, dtype=np.uint8) for codes in encode_pair(seq1, seq2, relabel=False))
+        integral = isinstance(indel_penalty, int) and np.issubdtype(table.dtype, np.integer)
+    dtype, inf = (np.int64, INT_INF) if integral else (np.float64, np.inf)
+    # seq2 is reversed so the characters along an anti-diagonal are a slice of both sequences
+    reversed_codes2 = codes2[::-1]
+
+    directions = DirectionMatrix(n + 1, m + 1, banded_width) if keep_directions else None
+    data = np.frombuffer(directions.data, dtype=np.uint8) if keep_directions else None
+    # offset of (x, y) in directions is y * row_step + x + shift
+    row_step = m + 1 if banded_width == -1 else 2 * banded_width
+    shift = 0 if banded_width == -1 else banded_width
+
+    # diagonals d - 2, d - 1 and d, each with a spare cell on both sides that is always infinity
+    before_last = np.full(n + 3, inf, dtype=dtype)
+    last = np.full(n + 3, inf, dtype=dtype)
+    current = np.full(n + 3, inf, dtype=dtype)
+    last[1] = 0
+
+    for d in range(1, n + m + 1):  # Space: O(kn) bytes Time: O(kn) cells in O(n+m) vector steps
+        lo = max(0, d - m, -((band - d) // 2))
+        hi = min(n, d, (d + band) // 2)
+        current[lo] = inf
+        current[hi + 2] = inf
+
+        # cells of row 0 and column 0 are plain runs of gaps
+        if lo == 0:
+            current[1] = d * indel_penalty
+            if keep_directions:
+                data[d + shift] = LEFT
+        if hi == d:
+            current[d + 1] = d * indel_penalty
+            if keep_directions:
+                data[d * row_step + shift] = UP
+
+        first, end = max(lo, 1), min(hi, d - 1)
+        if first <= end:
+            chars1 = codes1[first - 1:end]
+            chars2 = reversed_codes2[m - d + first:m - d + end + 1]
+            if table is None:
+                replace = before_last[first:end + 1] + np.where(chars1 == chars2, match_cost, sub_penalty)
+            else:
+                replace = before_last[first:end + 1] + table[chars1, chars2]
+            left = last[first + 1:end + 2] + indel_penalty
+            up = last[first:end + 1] + indel_penalty
+            best = np.minimum(left, up)
+            take_replace = replace <= best
+            current[first + 1:end + 2] = np.where(take_replace, replace, best)
+            if keep_directions:
+                data[np.arange(first, end + 1) * (row_step - 1) + d + shift] = np.where(
+                    take_replace, DIAGONAL, np.where(left <= up, LEFT, UP))
+
+        before_last, last, current = last, current, before_last
+
+    return last[n + 1].item(), directions
+
+
+def _encode(seq: str | bytes) -> np.ndarray:
+    if isinstance(seq, (bytes, bytearray)):
+        return np.frombuffer(seq, dtype=np.uint8)
+    return np.frombuffer(seq.encode('utf-32-le'), dtype=np.uint32)
+
+
+@per_table
+def _as_array(table: SubstitutionTable) -> np.ndarray:
+    array = np.array(table)
+    array.flags.writeable = False
+    return array
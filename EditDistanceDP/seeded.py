@@ -0,0 +1,153 @@
+from alignment import align
+from local import align_local
+from substitution import SubstitutionTable
+
+# (start in seq1, start in seq2, length) of an exact match
+Anchor = tuple[int, int, int]
+
+
+def align_seeded(
+        seq1: str,
+        seq2: str,
+        match_award=-3,
+        indel_penalty=5,
+        sub_penalty=1,
+        gap='-',
+        mode='semi-global',
+        k=15,
+        step: int | None = None,
+        max_occurrences=32,
+        engine='array',
+        substitution: SubstitutionTable | None = None
+) -> tuple[float, str, str, tuple[int, int], tuple[int, int]]:
+    """
+        Seed-and-extend alignment for inputs far too long for one table, e.g. a 30 kb query against a genome.
+        Exact k-mer matches of seq1 in an index of seq2 are grown into anchors, the heaviest co-linear chain of
+        anchors is kept, and align() (with adaptive_band) fills only the gaps between consecutive anchors.
+
+        In 'semi-global' mode all of seq1 is aligned against the part of seq2 the chain lies on:
+        the first and last anchor are projected along their diagonals to the ends of seq1.
+        'global' aligns both sequences end to end, so the ends of seq2 before and after the chain are aligned too.
+        The result is only optimal if the optimal alignment runs through the chained anchors.
+
+        :param k: length of the seeds
+        :param step: index every step-th k-mer of seq2; any exact match of at least k + step - 1 characters
+            is still found. Defaults to k // 2
+        :param max_occurrences: k-mers found more often than this in seq2 (repeats) are not used as seeds
+        :param engine: the align() engine that fills the gaps
+        Other parameters are the same as align().
+        :return: alignment cost, alignment 1, alignment 2, and the [start, end) spans of seq1 and seq2 they cover
+    """
+    if mode not in ('global', 'semi-global'):
+        raise ValueError(f'Unknown seeded alignment mode: {mode}')
+    n, m = len(seq1), len(seq2)
+    index = build_index(seq2, k, step or max(1, k // 2), max_occurrences)
+    anchors = chain_anchors(find_anchors(seq1, seq2, index, k))
+
+    if not anchors:
+        # nothing to anchor on: one alignment of the whole inputs
+        if mode == 'global':
+            return *align(seq1, seq2, match_award, indel_penalty, sub_penalty, gap=gap, engine=engine,
+                          adaptive_band=True, substitution=substitution), (0, n), (0, m)
+        return align_local(seq1, seq2, match_award, indel_penalty, sub_penalty, gap, 'semi-global',
+                           substitution=substitution)
+
+    if mode == 'global':
+        start, end = 0, m
+    else:
+        first_y, first_x, _ = anchors[0]
+        last_y, last_x, _ = anchors[-1]
+        start = max(0, first_x - first_y)
+        end = min(m, last_x + n - last_y)
+
+    # the gaps alternate with the anchors: before the first, between each pair and after the last
+    y, x = 0, start
+    cost = 0
+    pieces1, pieces2 = [], []
+    for anchor_y, anchor_x, length in [*anchors, (n, end, 0)]:  # Space: O(largest gap) Time: O(sum of gaps)
+        for (y0, y1), (x0, x1), band in (((y, anchor_y), (x, anchor_x), -1),
+                                         ((anchor_y, anchor_y + length), (anchor_x, anchor_x + length), 0)):
+            if y0 == y1 and x0 == x1:
+                continue
+            piece_cost, piece1, piece2 = align(seq1[y0:y1], seq2[x0:x1], match_award, indel_penalty, sub_penalty,
+                                               band, gap, engine, adaptive_band=band == -1,
+                                               substitution=substitution)
+            cost += piece_cost
+            pieces1.append(piece1)
+            pieces2.append(piece2)
+        y, x = anchor_y + length, anchor_x + length
+
+    return cost, seq1[:0].join(pieces1), seq2[:0].join(pieces2), (0, n), (start, end)
+
+
+def build_index(seq: str, k: int, step=1, max_occurrences: int | None = None) -> dict[str, list[int]]:
+    """
+    Start positions of every step-th k-mer of seq, keyed by k-mer.
+    K-mers occurring more than max_occurrences times are left out.
+    """
+    index: dict[str, list[int]] = {}
+    for x in range(0, len(seq) - k + 1, step):  # Space: O(m/step) Time: O(m*k/step)
+        index.setdefault(seq[x:x + k], []).append(x)
+    if max_occurrences is not None:
+        index = {kmer: positions for kmer, positions in index.items() if len(positions) <= max_occurrences}
+    return index
+
+
+def find_anchors(seq1: str, seq2: str, index: dict[str, list[int]], k: int) -> list[Anchor]:
+    """
+    Look up every k-mer of seq1 in the index of seq2 and grow each hit into a maximal exact match.
+    Hits on the same diagonal inside an anchor already found are skipped. Sorted by position in seq1.
+    """
+    n, m = len(seq1), len(seq2)
+    # diagonal (x - y) -> end in seq1 of the last anchor found on it
+    covered: dict[int, int] = {}
+    anchors = []
+    for y in range(n - k + 1):  # Space: O(anchors) Time: O(n*k + anchor lengths)
+        for x in index.get(seq1[y:y + k], ()):
+            if covered.get(x - y, -1) > y:
+                continue
+            start_y, start_x = y, x
+            while start_y > 0 and start_x > 0 and seq1[start_y - 1] == seq2[start_x - 1]:
+                start_y -= 1
+                start_x -= 1
+            end_y, end_x = y + k, x + k
+            while end_y < n and end_x < m and seq1[end_y] == seq2[end_x]:
+                end_y += 1
+                end_x += 1
+            covered[x - y] = end_y
+            anchors.append((start_y, start_x, end_y - start_y))
+    anchors.sort()
+    return anchors
+
+
+def chain_anchors(anchors: list[Anchor], lookback=64) -> list[Anchor]:
+    """
+    The co-linear chain of anchors covering the most characters of seq1, less the shift in diagonal
+    between consecutive anchors. Each anchor is linked to the best of the `lookback` anchors before it;
+    an anchor overlapping its predecessor is trimmed at the front.
+    """
+    if not anchors:
+        return []
+    scores = []
+    links: list[tuple[int, int]] = []  # (predecessor, characters trimmed from the front)
+    for i, (y, x, length) in enumerate(anchors):  # Space: O(h) Time: O(h * lookback)
+        best, link = length, (-1, 0)
+        for j in range(max(0, i - lookback), i):
+            prev_y, prev_x, prev_length = anchors[j]
+            overlap = max(prev_y + prev_length - y, prev_x + prev_length - x, 0)
+            if prev_y >= y or prev_x >= x or overlap >= length:
+                continue
+            score = scores[j] + length - overlap - abs((x - y) - (prev_x - prev_y))
+            if score > best:
+                best, link = score, (j, overlap)
+        scores.append(best)
+        links.append(link)
+
+    i = max(range(len(anchors)), key=scores.__getitem__)
+    chain = []
+    while i != -1:
+        y, x, length = anchors[i]
+        i, overlap = links[i]
+        chain.append((y + overlap, x + overlap, length - overlap))
+    chain.reverse()
+    return chain
@@ -0,0 +1,67 @@
+import mmap
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+def iter_records(path: str | Path) -> Iterator[tuple[str, bytes]]:
+    """
+    Lazily yield (header, sequence) for every record of a FASTA file.
+    A file that doesn't start with '>' is a single record with an empty header.
+    The file is memory-mapped; the lines of each sequence are sliced out without their newlines
+    and joined once into the bytes that are yielded.
+    """
+    with open(path, 'rb') as file:
+        if Path(path).stat().st_size == 0:
+            yield '', b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:1] != b'>':
+                yield '', _join_lines(data, 0, len(data))
+                return
+
+            start = 0
+            while start < len(data):  # Space: O(record) Time: O(file)
+                header_end = data.find(b'\n', start)
+                if header_end == -1:
+                    header_end = len(data)
+                header = data[start + 1:header_end].decode().strip()
+                next_record = data.find(b'\n>', header_end)
+                end = len(data) if next_record == -1 else next_record + 1
+                yield header, _join_lines(data, header_end + 1, end)
+                start = end
+
+
+def read_sequence(path: str | Path) -> bytes:
+    """
+    The sequence of a plain text file, or of the first record of a FASTA file
+    """
+    return next(iter_records(path))[1]
+
+
+def read_records(path: str | Path) -> dict[str, bytes]:
+    return dict(iter_records(path))
+
+
+def gap_and_join(seq: str | bytes, gap: str) -> tuple[str | int, Callable[[list], str | bytes]]:
+    """
+    The gap item and the join function to build alignments of seq:
+    bytes sequences are built from ints and joined with bytes(), strings from characters.
+    """
+    if isinstance(seq, (bytes, bytearray)):
+        return ord(gap), bytes
+    return gap, ''.join
+
+
+def _join_lines(data: mmap.mmap, start: int, end: int) -> bytes:
+    # the lines of the record, then one b''.join into the sequence
+    lines = []
+    while start < end:
+        line_end = data.find(b'\n', start, end)
+        if line_end == -1:
+            line_end = end
+        next_line = line_end + 1
+        if line_end > start and data[line_end - 1] == ord('\r'):
+            line_end -= 1
+        lines.append(data[start:line_end])
+        start = next_line
+    return b''.join(lines)
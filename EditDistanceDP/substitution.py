@@ -0,0 +1,117 @@
+from functools import lru_cache, wraps
+from typing import Callable
+
+# table[a][b] is the cost of aligning byte a of seq1 with byte b of seq2
+SubstitutionTable = tuple[tuple[float, ...], ...]
+
+# Tables whose properties are remembered by per_table
+TABLE_CACHE_SIZE = 32
+
+PURINES = b'AGag'
+PYRIMIDINES = b'CTUctu'
+
+
+@lru_cache(maxsize=32)
+def uniform_table(match_award=-3, sub_penalty=1) -> SubstitutionTable:
+    """
+    The match_award/sub_penalty scoring of align() as a table.
+    fill_table also tries a substitution on matching characters, so a match costs the smaller of the two.
+    """
+    match_cost = min(match_award, sub_penalty)
+    return tuple(tuple(match_cost if a == b else sub_penalty for b in range(256)) for a in range(256))
+
+
+@lru_cache(maxsize=32)
+def dna_table(match_award=-3, transition=1, transversion=2) -> SubstitutionTable:
+    """
+    Nucleotide costs where transitions (purine <-> purine, pyrimidine <-> pyrimidine) are cheaper
+    than transversions. Case is ignored and U counts as T; other bytes only match themselves.
+    """
+    table = [[transversion] * 256 for _ in range(256)]
+    for group in (PURINES, PYRIMIDINES):
+        for a in group:
+            for b in group:
+                table[a][b] = transition
+    for a in range(256):
+        table[a][a] = match_award
+    for a, b in (b'Aa', b'Cc', b'Gg', b'Tt', b'Uu', b'TU', b'tu', b'Tu', b'tU'):
+        table[a][b] = table[b][a] = match_award
+    return tuple(map(tuple, table))
+
+
+def table_from_scores(scores: dict[tuple[str, str], float], default: float, similarity=False) -> SubstitutionTable:
+    """
+    Build a table from per-pair costs such as a BLOSUM matrix; pairs are mirrored, so each needs listing once.
+    :param scores: cost of aligning the first character with the second
+    :param default: cost of every pair not in scores
+    :param similarity: scores are similarities where higher is better (BLOSUM, PAM); they are negated into costs
+    """
+    sign = -1 if similarity else 1
+    table = [[default] * 256 for _ in range(256)]
+    for (a, b), value in scores.items():
+        table[ord(a)][ord(b)] = table[ord(b)][ord(a)] = sign * value
+    return tuple(map(tuple, table))
+
+
+def encode_pair(seq1: str | bytes, seq2: str | bytes, relabel=True) -> tuple[bytes, bytes]:
+    """
+    Both sequences as bytes so a table can be indexed with their items.
+    Strings are encoded as latin-1; with relabel, strings outside latin-1 are instead renumbered by
+    alphabet, which only preserves the scoring of tables that treat every character alike (uniform_table).
+    """
+    if isinstance(seq1, (bytes, bytearray)) and isinstance(seq2, (bytes, bytearray)):
+        return seq1, seq2
+    try:
+        return _encode(seq1), _encode(seq2)
+    except UnicodeEncodeError:
+        if not relabel:
+            raise
+    alphabet = {c: i for i, c in enumerate(sorted(set(seq1) | set(seq2)))}
+    if len(alphabet) > 256:
+        raise ValueError('sequences use more than 256 distinct characters')
+    return bytes(map(alphabet.__getitem__, seq1)), bytes(map(alphabet.__getitem__, seq2))
+
+
+def per_table(function: Callable[[SubstitutionTable], object]) -> Callable[[SubstitutionTable], object]:
+    """
+    Remember function(table) for the last TABLE_CACHE_SIZE tables, by identity: hashing a table reads all
+    65,536 entries, as much work as most of these scans. The tables of uniform_table and dna_table are
+    cached themselves, so every call with the same scoring passes the same object.
+    """
+    results: dict[int, tuple[SubstitutionTable, object]] = {}
+
+    @wraps(function)
+    def cached(table: SubstitutionTable):
+        entry = results.get(id(table))
+        # the entry holds on to its table, so its id can't be reused by another object
+        if entry is not None and entry[0] is table:
+            return entry[1]
+        if len(results) >= TABLE_CACHE_SIZE:
+            del results[next(iter(results))]
+        result = results[id(table)] = table, function(table)
+        return result[1]
+
+    return cached
+
+
+@per_table
+def is_symmetric(table: SubstitutionTable) -> bool:
+    """
+    Whether aligning a with b costs the same as b with a for every pair, so align() costs do not
+    depend on which sequence comes first
+    """
+    return all(table[a][b] == table[b][a] for a in range(len(table)) for b in range(a))
+
+
+@per_table
+def cheapest(table: SubstitutionTable) -> float:
+    return min(map(min, table))
+
+
+@per_table
+def has_integer_costs(table: SubstitutionTable) -> bool:
+    return all(isinstance(cost, int) for row in table for cost in row)
+
+
+def _encode(seq: str | bytes) -> bytes:
+    return seq if isinstance(seq, (bytes, bytearray)) else seq.encode('latin-1')
@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import pytest
 from byu_pytest_utils import with_import, max_score, test_files
 
 from test_utils import timeout
@@ -128,3 +129,390 @@ def test_massive_dna_alignment_banded(align):
     assert score == -17380
     assert aseq1 == expected_align1
     assert aseq2 == expected_align2
+
+
+@max_score(5)
+@with_import('alignment')
+def test_medium_dna_alignment_linear_memory(align):
+    seq1 = 'ataagagtgattggcgatatcggctccgtacgtaccctttctactctcgggctcttccccgttagtttaaatctaatctctttataaacggcacttcc'
+    seq2 = 'ataagagtgattggcgtccgtacgtaccctttctactctcaaactcttgttagtttaaatctaatctaaactttataaacggcacttcctgtgtgtccat'
+
+    assert align(seq1, seq2, engine='hirschberg') == align(seq1, seq2)
+    assert align(seq1, seq2, banded_width=3, engine='hirschberg') == align(seq1, seq2, banded_width=3)
+
+
+@max_score(10)
+@with_import('alignment')
+@timeout(180)
+def test_large_dna_alignment_linear_memory(align):
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:3000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:3000]
+
+    score, aseq1, aseq2 = align(seq1, seq2, engine='hirschberg')
+
+    expected_align1 = (test_files / 'large_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'large_bovine_murine_align2.txt').read_text()
+
+    assert score == -3666
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+
+@max_score(10)
+@with_import('alignment')
+@timeout(20)
+def test_massive_dna_alignment_banded_linear_memory(align):
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:31000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:31000]
+
+    score, aseq1, aseq2 = align(seq1, seq2, banded_width=3, engine='hirschberg')
+
+    expected_align1 = (test_files / 'massive_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'massive_bovine_murine_align2.txt').read_text()
+
+    assert score == -17380
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+
+@max_score(5)
+@with_import('alignment')
+def test_small_alignment_arrays(align):
+    assert align('polynomial', 'exponential', engine='array') == (-1, 'polyn-omial', 'exponential')
+    assert align('GGGGTTTTAAAACCCCTTTT', 'TTTTAAAACCCCTTTTGGGG', banded_width=2, engine='array') == \
+           (6, 'GGGGTTTTAAAACCCCTT--TT', '--TTTTAAAACCCCTTTTGGGG')
+
+
+@max_score(10)
+@with_import('alignment')
+@timeout(20)
+def test_large_dna_alignment_arrays(align):
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:3000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:3000]
+
+    score, aseq1, aseq2 = align(seq1, seq2, engine='array')
+
+    expected_align1 = (test_files / 'large_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'large_bovine_murine_align2.txt').read_text()
+
+    assert score == -3666
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+
+@max_score(10)
+@with_import('alignment')
+@timeout(20)
+def test_large_dna_alignment_numpy(align):
+    pytest.importorskip('numpy')
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:3000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:3000]
+
+    score, aseq1, aseq2 = align(seq1, seq2, engine='numpy')
+
+    expected_align1 = (test_files / 'large_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'large_bovine_murine_align2.txt').read_text()
+
+    assert score == -3666
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+    score, aseq1, aseq2 = align(seq1, seq2, banded_width=3, engine='numpy')
+
+    expected_align1 = (test_files / 'large_banded_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'large_banded_bovine_murine_align2.txt').read_text()
+
+    assert score == -2735
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+
+@max_score(5)
+@with_import('alignment')
+@timeout(20)
+def test_massive_dna_alignment_banded_score_only(align):
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:31000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:31000]
+
+    assert align(seq1, seq2, banded_width=3, score_only=True) == (-17380, None, None)
+    assert align('ATATATATAT', 'TATATATATA', score_only=True) == (-17, None, None)
+
+
+@max_score(5)
+@with_import('alignment')
+def test_traceback_from_direction_matrix(traceback):
+    from alignment import align, fill_directions
+
+    seq1 = 'ataagagtgattggcgatatcggctccgtacgtaccctttctactctcgggctcttccccgttagtttaaatctaatctctttataaacggcacttcc'
+    seq2 = 'ataagagtgattggcgtccgtacgtaccctttctactctcaaactcttgttagtttaaatctaatctaaactttataaacggcacttcctgtgtgtccat'
+
+    score, directions = fill_directions(seq1, seq2)
+    assert (score, *traceback(seq1, seq2, directions)) == align(seq1, seq2)
+    assert traceback(seq1[:40], seq2[:30], directions) == align(seq1[:40], seq2[:30])[1:]
+
+
+@max_score(5)
+@with_import('batch')
+@timeout(60)
+def test_pairwise_matrix(pairwise_matrix):
+    from alignment import align
+    from batch import align_many
+
+    seqs = ['polynomial', 'exponential', 'ATGCATGC', 'ATGGTGC', 'AGTCGA', 'ATCGT']
+    matrix = pairwise_matrix(seqs, workers=2, chunk_size=4)
+
+    for i, seq1 in enumerate(seqs):
+        for j, seq2 in enumerate(seqs):
+            assert matrix[i][j] == align(seq1, seq2)[0]
+
+    results = dict(align_many('ATGCATGC', seqs, workers=2, chunk_size=2))
+    assert results == {j: align('ATGCATGC', seq) for j, seq in enumerate(seqs)}
+
+    # semi-global costs depend on which sequence is the query, so both halves are computed
+    seqs = ['ACGTACGTAA', 'CGTAC', 'TTTTACGTACGTAATT']
+    for workers in (1, 2):
+        matrix = pairwise_matrix(seqs, workers=workers, engine='array', mode='semi-global')
+        for i, seq1 in enumerate(seqs):
+            for j, seq2 in enumerate(seqs):
+                assert matrix[i][j] == align(seq1, seq2, engine='array', mode='semi-global')[0]
+
+
+@max_score(10)
+@with_import('alignment')
+@timeout(60)
+def test_large_dna_alignment_adaptive_band(align):
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:3000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:3000]
+
+    score, aseq1, aseq2 = align(seq1, seq2, banded_width=3, engine='array', adaptive_band=True)
+
+    expected_align1 = (test_files / 'large_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'large_bovine_murine_align2.txt').read_text()
+
+    assert score == -3666
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+
+@max_score(3)
+@with_import('alignment')
+def test_small_dna_alignment_adaptive_band(align):
+    assert align('GGGGTTTTAAAACCCCTTTT', 'TTTTAAAACCCCTTTTGGGG', banded_width=2, adaptive_band=True) == \
+           (-8, 'GGGGTTTTAAAACCCCTTTT----', '----TTTTAAAACCCCTTTTGGGG')
+
+
+@max_score(5)
+@with_import('seq_io')
+def test_read_fasta_records(iter_records, tmp_path):
+    from alignment import align
+
+    fasta = tmp_path / 'pair.fasta'
+    fasta.write_bytes(b'>bovine sample\r\nATGCA\r\nTGC\r\n>murine\nATGG\nTGC\n\n')
+    records = list(iter_records(fasta))
+    assert records == [('bovine sample', b'ATGCATGC'), ('murine', b'ATGGTGC')]
+    assert all(type(sequence) is bytes for _, sequence in records)
+
+    assert align(records[0][1], records[1][1], engine='array') == (-12, b'ATGCATGC', b'ATG-GTGC')
+    assert align(records[0][1], records[1][1]) == (-12, b'ATGCATGC', b'ATG-GTGC')
+
+    genome = test_files / 'bovine_coronavirus.txt'
+    assert list(iter_records(genome)) == [('', read_sequence(genome).encode())]
+
+
+@max_score(5)
+@with_import('alignment')
+def test_substitution_table_alignment(align):
+    from substitution import dna_table, uniform_table
+
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:300].encode()
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:300].encode()
+
+    # the uniform table is exactly the match_award / sub_penalty scoring
+    uniform = align(seq1, seq2, engine='array', substitution=uniform_table(-3, 1))
+    assert uniform == align(seq1, seq2)
+
+    # a transition (a <-> g) is cheaper than a transversion (a <-> c)
+    table = dna_table(match_award=-3, transition=1, transversion=3)
+    assert align(b'AAGA', b'AGGA', engine='array', substitution=table)[0] == -8
+    assert align(b'AAGA', b'ACGA', engine='array', substitution=table)[0] == -6
+
+    result = align(seq1, seq2, engine='array', substitution=table)
+    assert align(seq1, seq2, engine='hirschberg', substitution=table) == result
+    assert align(seq1, seq2, score_only=True, substitution=table) == (result[0], None, None)
+
+    # properties are remembered per table object; a changed copy is scanned again
+    from substitution import cheapest, has_integer_costs
+    halved = tuple(tuple(cost / 2 for cost in row) for row in table)
+    assert (cheapest(table), has_integer_costs(table)) == (-3, True)
+    assert (cheapest(halved), has_integer_costs(halved)) == (-1.5, False)
+    assert align(seq1, seq2, engine='array', indel_penalty=2.5, substitution=halved)[0] == result[0] / 2
+
+
+@max_score(5)
+@with_import('alignment')
+@timeout(20)
+def test_affine_gap_alignment(align):
+    # one run of three gaps: 3 matches + gap_open + 3 * indel_penalty
+    assert align('AAAAAA', 'AAA', engine='array', gap_open=10) == (16, 'AAAAAA', '---AAA')
+
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:1000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:1000]
+    result = align(seq1, seq2, engine='array', gap_open=10)
+    assert align(seq1, seq2, engine='array', gap_open=10, score_only=True) == (result[0], None, None)
+    assert result[1].replace('-', '') == seq1
+    assert result[2].replace('-', '') == seq2
+
+    banded = align(seq1, seq2, banded_width=100, engine='array', gap_open=10)
+    assert banded[0] >= result[0]
+
+    # a deletion of 5 and an insertion of 3 keep the best path within 5 diagonals, so a band of 20 holds it
+    seq1 = seq1[:200]
+    seq2 = seq1[:50] + seq1[55:120] + 'ACG' + seq1[120:170] + 't' + seq1[171:]
+    expected = _gotoh_cost(seq1, seq2, gap_open=10)
+    assert align(seq1, seq2, engine='array', gap_open=10)[0] == expected
+    banded = align(seq1, seq2, banded_width=20, engine='array', gap_open=10)
+    assert banded[0] == expected
+    assert banded[1].replace('-', '') == seq1 and banded[2].replace('-', '') == seq2
+
+
+def _gotoh_cost(seq1: str, seq2: str, match_award=-3, indel_penalty=5, sub_penalty=1, gap_open=0) -> float:
+    """
+    Brute-force affine alignment cost: full tables of the best cost ending in a (mis)match,
+    a gap in seq2 and a gap in seq1
+    """
+    inf = float('inf')
+    n, m = len(seq1), len(seq2)
+    match = [[inf] * (m + 1) for _ in range(n + 1)]
+    gap2 = [[inf] * (m + 1) for _ in range(n + 1)]
+    gap1 = [[inf] * (m + 1) for _ in range(n + 1)]
+    match[0][0] = 0
+    for y in range(n + 1):
+        for x in range(m + 1):
+            if y and x:
+                pair = min(match_award, sub_penalty) if seq1[y - 1] == seq2[x - 1] else sub_penalty
+                match[y][x] = min(match[y - 1][x - 1], gap2[y - 1][x - 1], gap1[y - 1][x - 1]) + pair
+            if y:
+                gap2[y][x] = min(match[y - 1][x] + gap_open, gap2[y - 1][x], gap1[y - 1][x] + gap_open) + indel_penalty
+            if x:
+                gap1[y][x] = min(match[y][x - 1] + gap_open, gap1[y][x - 1], gap2[y][x - 1] + gap_open) + indel_penalty
+    return min(match[n][m], gap2[n][m], gap1[n][m])
+
+
+@max_score(5)
+@with_import('alignment')
+@timeout(20)
+def test_query_in_genome_alignment(align):
+    genome = read_sequence(test_files / 'bovine_coronavirus.txt')
+    query = genome[12000:12300]
+    # a substitution and a 10-gap deletion; x_drop must exceed the 50 the gap costs to keep the best alignment
+    query = query[:100] + 'a' + query[101:200] + query[210:]
+
+    result = align(query, genome, engine='array', mode='semi-global', x_drop=60)
+    assert result[1].replace('-', '') == query
+    assert result[2].replace('-', '') == genome[12000:12300]
+    assert align(query, genome[11000:13000], engine='array', mode='semi-global') == result
+
+    local = align(query, genome[11000:13000], engine='array', mode='local')
+    assert local[0] <= result[0]
+    assert align(query, genome, engine='array', mode='local', x_drop=60) == local
+
+    with pytest.raises(ValueError):
+        align(query, genome[11000:13000], engine='array', x_drop=60)
+
+
+@max_score(5)
+@with_import('bitparallel')
+@timeout(10)
+def test_bit_parallel_edit_distance(edit_distance):
+    from bitparallel import within_distance
+
+    assert edit_distance('kitten', 'sitting') == 3
+    assert edit_distance('', 'abc') == 3
+    assert edit_distance('kitten', 'sitting', max_distance=2) is None
+    assert within_distance('kitten', 'sitting', 3)
+
+    from alignment import align
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:1000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:1000]
+    distance = edit_distance(seq1, seq2)
+    assert align(seq1, seq2, 0, 1, 1, engine='array')[0] == distance
+    assert align(seq1, seq2, 0, 2, 2, score_only=True) == (2 * distance, None, None)
+
+
+@max_score(5)
+@with_import('seeded')
+@timeout(30)
+def test_seeded_query_in_genome(align_seeded):
+    bovine = read_sequence(test_files / 'bovine_coronavirus.txt')
+    murine = read_sequence(test_files / 'murine_hepatitus.txt')
+    genome = murine + bovine
+    region = bovine[5000:8000]
+    query = region[:1000] + 'a' + region[1001:2000] + region[2004:]
+
+    cost, aligned1, aligned2, span1, span2 = align_seeded(query, genome)
+    assert span1 == (0, len(query))
+    assert span2 == (len(murine) + 5000, len(murine) + 8000)
+    assert aligned1.replace('-', '') == query
+    assert aligned2.replace('-', '') == region
+
+    from alignment import align
+    assert cost == align(query, region, engine='array', score_only=True)[0]
+
+
+@max_score(3)
+@with_import('benchmark')
+@timeout(30)
+def test_benchmark_compare(run_case):
+    from benchmark import compare
+
+    record = run_case('array', 'synthetic-0.1', 200, repeat=1)
+    assert record['score'] == run_case('hirschberg', 'synthetic-0.1', 200, repeat=1)['score']
+    baseline = {'results': [record]}
+    assert compare(baseline, baseline) == []
+
+    slower = {'results': [{**record, 'seconds': record['seconds'] * 2}]}
+    assert len(compare(baseline, slower, threshold=0.5)) == 1
+
+
+@max_score(10)
+@with_import('wavefront')
+@timeout(60)
+def test_large_dna_alignment_wavefront(align_wavefront):
+    seq1 = read_sequence(test_files / 'bovine_coronavirus.txt')[:3000]
+    seq2 = read_sequence(test_files / 'murine_hepatitus.txt')[:3000]
+
+    score, aseq1, aseq2 = align_wavefront(seq1, seq2, workers=2, tile_size=500)
+
+    expected_align1 = (test_files / 'large_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'large_bovine_murine_align2.txt').read_text()
+
+    assert score == -3666
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+    score, aseq1, aseq2 = align_wavefront(seq1, seq2, banded_width=3, workers=1, tile_size=700)
+
+    expected_align1 = (test_files / 'large_banded_bovine_murine_align1.txt').read_text()
+    expected_align2 = (test_files / 'large_banded_bovine_murine_align2.txt').read_text()
+
+    assert score == -2735
+    assert aseq1 == expected_align1
+    assert aseq2 == expected_align2
+
+
+@max_score(3)
+@with_import('cache')
+def test_alignment_cache(AlignmentCache, tmp_path):
+    with AlignmentCache(max_entries=2, path=tmp_path / 'alignments.sqlite') as cache:
+        expected = (-1, 'polyn-omial', 'exponential')
+        assert cache.align('polynomial', 'exponential', engine='array') == expected
+        assert cache.align('polynomial', 'exponential') == expected
+        assert cache.align('polynomial', 'exponential', score_only=True) == (-1, None, None)
+        assert cache.align('polynomial', 'exponential', indel_penalty=4) != expected
+        cache.align('ATATATATAT', 'TATATATATA')
+        assert cache.cache_info() == (2, 0, 3, 1, 2, 2)
+
+    with AlignmentCache(path=tmp_path / 'alignments.sqlite') as cache:
+        assert cache.align('polynomial', 'exponential') == expected
+        assert cache.align(b'polynomial', b'exponential') == (-1, b'polyn-omial', b'exponential')
+        assert cache.cache_info().disk_hits == 1
@@ -0,0 +1,281 @@
+import os
+from array import array
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+
+from array_engine import DIAGONAL, LEFT, UP, prepare_scoring
+from seq_io import gap_and_join
+from substitution import SubstitutionTable
+
+TILE_SIZE = 256
+
+# Every cost takes 8 bytes in shared memory, 'q' or 'd' alike
+ITEM_SIZE = 8
+
+# State of this process, set once by _attach so tasks only carry tile coordinates
+_shared: SharedMemory | None = None
+_problem: tuple = ()
+
+
+def align_wavefront(
+        seq1: str,
+        seq2: str,
+        match_award=-3,
+        indel_penalty=5,
+        sub_penalty=1,
+        banded_width=-1,
+        gap='-',
+        substitution: SubstitutionTable | None = None,
+        score_only=False,
+        workers: int | None = None,
+        tile_size=TILE_SIZE,
+        use_threads=False
+) -> tuple[float, str | None, str | None]:
+    """
+        Align seq1 against seq2 by splitting the table into tiles filled in parallel as a wavefront:
+        a tile can start once the tiles above and to its left are done, so all tiles on an anti-diagonal
+        of tiles run at the same time.
+
+        Tiles only exchange their edges: the bottom row and right column of every tile are written to
+        shared memory (one row of costs per row of tiles and one column per column of tiles), and a tile
+        reads the edges of its neighbours from there. No back-pointers are kept while filling; the traceback
+        refills only the tiles the alignment passes through, from their stored edges, so it costs
+        O((n+m) * tile_size) time and O(tile_size ** 2) bytes. Results match the table version of align().
+
+        :param workers: worker processes (or threads); defaults to the number of CPUs, 1 fills in this process
+        :param tile_size: rows and columns per tile
+        :param use_threads: fill tiles in threads instead of processes, for free-threaded Python builds
+        Other parameters are the same as align().
+        :return: alignment cost, alignment 1, alignment 2
+    """
+    n, m = len(seq1), len(seq2)
+    band = banded_width if banded_width != -1 else max(n, m)
+    if abs(n - m) > band:
+        raise ValueError(f'banded_width={banded_width} does not reach the end of the alignment')
+
+    codes1, codes2, substitution, typecode, inf = prepare_scoring(seq1, seq2, match_award, indel_penalty,
+                                                                  sub_penalty, substitution)
+    ys = list(range(0, n, tile_size)) + [n]
+    xs = list(range(0, m, tile_size)) + [m]
+    # the edge rows (one per boundary between rows of tiles) and then the edge columns
+    shared = SharedMemory(create=True, size=max(1, len(ys) * (m + 1) + len(xs) * (n + 1)) * ITEM_SIZE)
+    try:
+        problem = (shared.name, codes1, codes2, substitution, indel_penalty, band, typecode, inf, ys, xs)
+        _attach(*problem)
+        _init_edges(n, m, band, indel_penalty, typecode, inf, ys, xs)
+        if len(ys) > 1 and len(xs) > 1:
+            _run_wavefront(len(ys) - 1, len(xs) - 1, problem, workers, use_threads)
+        cost = _read(len(ys) - 1, m, m + 1, rows=True)[0]
+        if score_only:
+            return cost, None, None
+        return cost, *_traceback(seq1, seq2, gap)
+    finally:
+        _detach()
+        shared.close()
+        shared.unlink()
+
+
+def _run_wavefront(tile_rows: int, tile_columns: int, problem: tuple, workers: int | None, use_threads: bool):
+    """
+    Submit every tile as soon as the tiles above and to its left are done.
+    Tiles entirely outside the band are never filled; their edges stay at infinity.
+    """
+    _, _, _, _, _, band, _, _, ys, xs = problem
+    waiting = {(i, j): (i > 1) + (j > 1) for i in range(1, tile_rows + 1) for j in range(1, tile_columns + 1)}
+    ready = [(1, 1)]
+
+    def finish(tile):
+        i, j = tile
+        for after in ((i + 1, j), (i, j + 1)):
+            if after in waiting:
+                waiting[after] -= 1
+                if waiting[after] == 0:
+                    ready.append(after)
+
+    if workers == 1:
+        while ready:
+            tile = ready.pop()
+            if _inside_band(*tile, band, ys, xs):
+                _fill_tile(*tile)
+            finish(tile)
+        return
+
+    pool_type = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    with pool_type(workers or os.cpu_count(), initializer=_attach, initargs=problem) as pool:
+        running = {}
+        while ready or running:  # Space: O(tiles) Time: O(n*m / workers) on a wide enough wavefront
+            while ready:
+                tile = ready.pop()
+                if _inside_band(*tile, band, ys, xs):
+                    running[pool.submit(_fill_tile, *tile)] = tile
+                else:
+                    finish(tile)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+                finish(running.pop(future))
+
+
+def _inside_band(i: int, j: int, band: int, ys: list[int], xs: list[int]) -> bool:
+    y0, y1, x0, x1 = ys[i - 1], ys[i], xs[j - 1], xs[j]
+    return x0 + 1 <= y1 + band and x1 >= y0 + 1 - band
+
+
+def _init_edges(n: int, m: int, band: int, indel_penalty, typecode: str, inf: float, ys: list[int],
+                xs: list[int]):
+    """
+    Every edge starts at infinity, except the top row and left column of the table
+    and the cells of the edges that lie on them.
+    """
+    top = array(typecode, [x * indel_penalty if x <= band else inf for x in range(m + 1)])
+    left = array(typecode, [y * indel_penalty if y <= band else inf for y in range(n + 1)])
+    for i, y in enumerate(ys):
+        row = array(typecode, [inf]) * (m + 1)
+        row[0] = left[y]
+        _write(i, 0, row if i else top, rows=True)
+    for j, x in enumerate(xs):
+        column = array(typecode, [inf]) * (n + 1)
+        column[0] = top[x]
+        _write(j, 0, column if j else left, rows=False)
+
+
+def _fill_tile(i: int, j: int, keep_directions=False) -> bytearray | None:
+    """
+    Fill tile (i, j): rows ys[i - 1] + 1..ys[i] and columns xs[j - 1] + 1..xs[j].
+    Reads the edges left by the tiles above and to the left and writes its own bottom row and right column.
+    With keep_directions, returns the back-pointers of the tile row by row instead of writing its edges.
+    """
+    _, seq1, seq2, substitution, indel_penalty, band, typecode, inf, ys, xs = _problem
+    y0, y1, x0, x1 = ys[i - 1], ys[i], xs[j - 1], xs[j]
+    width = x1 - x0
+    prev = _read(i - 1, x0, x1 + 1, rows=True)
+    left_edge = _read(j - 1, y0, y1 + 1, rows=False)
+    right_edge = array(typecode)
+    directions = bytearray() if keep_directions else None
+
+    for y in range(y0 + 1, y1 + 1):  # Space: O(tile width) Time: O(tile cells)
+        lo = min(max(x0 + 1, y - band), x1 + 1)
+        hi = min(x1, y + band)
+        edge = left_edge[y - y0]
+        substitution_costs = substitution[seq1[y - 1]]
+        left = edge if lo == x0 + 1 else inf
+        diagonal = prev[lo - 1 - x0]
+        costs = [edge] + [inf] * (lo - 1 - x0)
+        push_cost = costs.append
+        if directions is None:
+            for b, up in zip(seq2[lo - 1:hi], prev[lo - x0:hi - x0 + 1]):
+                replace = diagonal + substitution_costs[b]
+                diagonal = up
+                up += indel_penalty
+                left += indel_penalty
+                if replace <= left and replace <= up:
+                    left = replace
+                elif up < left:
+                    left = up
+                push_cost(left)
+        else:
+            directions += bytes(lo - 1 - x0)
+            push_direction = directions.append
+            for b, up in zip(seq2[lo - 1:hi], prev[lo - x0:hi - x0 + 1]):
+                replace = diagonal + substitution_costs[b]
+                diagonal = up
+                up += indel_penalty
+                left += indel_penalty
+                if replace <= left and replace <= up:
+                    left = replace
+                    push_direction(DIAGONAL)
+                elif left <= up:
+                    push_direction(LEFT)
+                else:
+                    left = up
+                    push_direction(UP)
+                push_cost(left)
+            directions += bytes(x1 - max(hi, lo - 1))
+        costs += [inf] * (x1 - max(hi, lo - 1))
+        prev = array(typecode, costs)
+        right_edge.append(prev[width])
+
+    if directions is not None:
+        return directions
+    _write(i, x0 + 1, prev[1:], rows=True)
+    _write(j, y0 + 1, right_edge, rows=False)
+    return None
+
+
+def _traceback(seq1: str, seq2: str, gap='-') -> tuple[str, str]:
+    """
+    Walk back from the last cell, refilling each tile the path enters to get its back-pointers.
+    """
+    ys, xs = _problem[-2:]
+    gap, join = gap_and_join(seq1, gap)
+    aligned_sq1: list[str] = []
+    aligned_sq2: list[str] = []
+    tile = None
+    x = len(seq2)
+    y = len(seq1)
+    while x > 0 or y > 0:  # Space: O(n+m) Time: O((n+m) * tile_size)
+        if y == 0:
+            direction = LEFT
+        elif x == 0:
+            direction = UP
+        else:
+            i, j = bisect_left(ys, y), bisect_left(xs, x)
+            if tile != (i, j):
+                tile = i, j
+                directions = _fill_tile(i, j, keep_directions=True)
+                y0, x0, width = ys[i - 1], xs[j - 1], xs[j] - xs[j - 1]
+            direction = directions[(y - y0 - 1) * width + x - x0 - 1]
+        if direction == DIAGONAL:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(seq2[x - 1])
+            x -= 1
+            y -= 1
+        elif direction == LEFT:
+            aligned_sq1.append(gap)
+            aligned_sq2.append(seq2[x - 1])
+            x -= 1
+        else:
+            aligned_sq1.append(seq1[y - 1])
+            aligned_sq2.append(gap)
+            y -= 1
+    aligned_sq1.reverse()
+    aligned_sq2.reverse()
+    return join(aligned_sq1), join(aligned_sq2)
+
+
+def _attach(name: str, *problem):
+    global _shared, _problem
+    if _shared is None or _shared.name != name:
+        _shared = SharedMemory(name)
+    _problem = (name, *problem)
+
+
+def _detach():
+    global _shared, _problem
+    if _shared is not None:
+        _shared.close()
+    _shared = None
+    _problem = ()
+
+
+def _edge_offset(index: int, start: int, rows: bool) -> int:
+    seq1, seq2, ys = _problem[1], _problem[2], _problem[8]
+    if rows:
+        return (index * (len(seq2) + 1) + start) * ITEM_SIZE
+    return (len(ys) * (len(seq2) + 1) + index * (len(seq1) + 1) + start) * ITEM_SIZE
+
+
+def _read(index: int, start: int, end: int, rows: bool) -> array:
+    """
+    Costs start..end - 1 of edge row (rows=True) or edge column `index`.
+    """
+    offset = _edge_offset(index, start, rows)
+    costs = array(_problem[6])
+    costs.frombytes(_shared.buf[offset:offset + (end - start) * ITEM_SIZE])
+    return costs
+
+
+def _write(index: int, start: int, costs: array, rows: bool):
+    offset = _edge_offset(index, start, rows)
+    _shared.buf[offset:offset + len(costs) * ITEM_SIZE] = costs.tobytes()
@@ -0,0 +1,185 @@
+import random
+from argparse import ArgumentParser
+from collections import Counter
+from time import perf_counter
+
+from bulk import decrypt_bytes, encrypt_bytes
+from fermat import FixedBase, ModContext, mod_exp
+from rsa import (PrivateKey, ext_euclid, generate_key, generate_key_pairs, generate_large_prime, lehmer_ext_euclid,
+                 modinv)
+
+
+def time_call(function, *args, repeat=5) -> float:
+    """
+    The best of `repeat` timings of function(*args), in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        function(*args)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def bench_mod_exp(sizes: list[int], repeat: int):
+    """
+    mod_exp against the built-in three-argument pow for full-size exponents
+    """
+    print(f'{"bits":>6} {"mod_exp ms":>11} {"pow ms":>9} {"ratio":>6}')
+    for bits in sizes:
+        N = random.getrandbits(bits) | 1 << (bits - 1) | 1
+        x = random.randrange(2, N)
+        y = random.getrandbits(bits) | 1 << (bits - 1)
+        ours = time_call(mod_exp, x, y, N, repeat=repeat)
+        builtin = time_call(pow, x, y, N, repeat=repeat)
+        print(f'{bits:>6} {ours * 1e3:>11.3f} {builtin * 1e3:>9.3f} {ours / builtin:>6.2f}')
+
+
+def bench_mod_context(sizes: list[int], witnesses: int):
+    """
+    Fermat-style rounds: many bases raised to N - 1 under one modulus
+    """
+    print(f'{"bits":>6} {"mod_exp ms":>11} {"context ms":>11} {"montgomery ms":>14}')
+    for bits in sizes:
+        N = random.getrandbits(bits) | 1 << (bits - 1) | 1
+        bases = [random.randrange(2, N) for _ in range(witnesses)]
+        context, montgomery = ModContext(N), ModContext(N, montgomery=True)
+        timings = []
+        for power in (lambda a: mod_exp(a, N - 1, N), lambda a: context.pow(a, N - 1),
+                      lambda a: montgomery.pow(a, N - 1)):
+            start = perf_counter()
+            for a in bases:
+                power(a)
+            timings.append((perf_counter() - start) / witnesses)
+        print(f'{bits:>6} {timings[0] * 1e3:>11.3f} {timings[1] * 1e3:>11.3f} {timings[2] * 1e3:>14.3f}')
+
+
+def bench_fixed_base(sizes: list[int], exponents: int):
+    """
+    One small base raised to many full-size exponents: mod_exp and pow against a FixedBase table,
+    whose one-off build time is shown apart
+    """
+    print(f'{"bits":>6} {"window":>7} {"build ms":>9} {"mod_exp ms":>11} {"fixed base ms":>14} {"pow ms":>9}')
+    for bits in sizes:
+        N = random.getrandbits(bits) | 1 << (bits - 1) | 1
+        ys = [random.getrandbits(bits) for _ in range(exponents)]
+        start = perf_counter()
+        table = FixedBase(65537, N, bits)
+        build = perf_counter() - start
+        timings = []
+        for power in (lambda y: mod_exp(65537, y, N), table.pow, lambda y: pow(65537, y, N)):
+            start = perf_counter()
+            for y in ys:
+                power(y)
+            timings.append((perf_counter() - start) / exponents)
+        print(f'{bits:>6} {table.window:>7} {build * 1e3:>9.3f} {timings[0] * 1e3:>11.3f} '
+              f'{timings[1] * 1e3:>14.3f} {timings[2] * 1e3:>9.3f}')
+
+
+def bench_prime_search(sizes: list[int], count: int):
+    """
+    What each prime of generate_large_prime costs: odd numbers walked, sieve survivors tested,
+    Miller-Rabin rounds, and time
+    """
+    print(f'{"bits":>6} {"candidates":>11} {"tested":>7} {"MR rounds":>10} {"ms/prime":>9}')
+    for bits in sizes:
+        stats = Counter()
+        start = perf_counter()
+        for _ in range(count):
+            generate_large_prime(bits, stats=stats)
+        seconds = perf_counter() - start
+        print(f'{bits:>6} {stats["candidates"] / count:>11.1f} {stats["tested"] / count:>7.1f} '
+              f'{stats["rounds"] / count:>10.1f} {seconds / count * 1e3:>9.1f}')
+
+
+def bench_modinv(sizes: list[int], repeat: int):
+    """
+    Inverses of full-size exponents modulo a phi of `bits` bits: both extended Euclids and modinv
+    against the built-in pow(e, -1, phi)
+    """
+    print(f'{"bits":>6} {"ext_euclid ms":>14} {"lehmer ms":>10} {"modinv ms":>10} {"pow ms":>9}')
+    for bits in sizes:
+        phi = random.getrandbits(bits) | 1 << (bits - 1)
+        e = random.randrange(3, phi)
+        while ext_euclid(phi, e)[2] != 1:
+            e = random.randrange(3, phi)
+        timings = [time_call(function, *args, repeat=repeat) for function, args in (
+            (ext_euclid, (phi, e)), (lehmer_ext_euclid, (phi, e)), (modinv, (e, phi)), (pow, (e, -1, phi)))]
+        print(f'{bits:>6}' + ''.join(f' {seconds * 1e3:>{width}.3f}'
+                                      for seconds, width in zip(timings, (14, 10, 10, 9))))
+
+
+def bench_private_key(sizes: list[int], messages: int, seed: int):
+    """
+    Decryption under a key whose N has `bits` bits: c^d mod N against the CRT of PrivateKey
+    """
+    print(f'{"bits":>6} {"plain ms":>9} {"CRT ms":>7} {"speedup":>8}')
+    for bits in sizes:
+        key = generate_key(bits // 2, seed=seed)
+        public_only = PrivateKey(key.N, key.e, key.d)
+        ciphertexts = [random.randrange(key.N) for _ in range(messages)]
+        timings = []
+        for decrypt in (public_only.decrypt, key.decrypt):
+            start = perf_counter()
+            for c in ciphertexts:
+                decrypt(c)
+            timings.append((perf_counter() - start) / messages)
+        print(f'{bits:>6} {timings[0] * 1e3:>9.3f} {timings[1] * 1e3:>7.3f} {timings[0] / timings[1]:>8.2f}')
+
+
+def bench_bulk(sizes: list[int], kilobytes: int, workers: list[int], seed: int):
+    """
+    Throughput of encrypt_bytes and decrypt_bytes on a random payload, under a key whose N has `bits` bits
+    """
+    print(f'{"bits":>6} {"workers":>8} {"encrypt MB/s":>13} {"decrypt MB/s":>13}')
+    data = random.randbytes(kilobytes * 1024)
+    for bits in sizes:
+        key = generate_key(bits // 2, seed=seed)
+        for count in workers:
+            start = perf_counter()
+            ciphertexts = encrypt_bytes(data, key.N, key.e, count)
+            middle = perf_counter()
+            assert decrypt_bytes(ciphertexts, key, count) == data
+            end = perf_counter()
+            megabytes = len(data) / 1e6
+            print(f'{bits:>6} {count:>8} {megabytes / (middle - start):>13.3f} {megabytes / (end - middle):>13.4f}')
+
+
+def bench_key_generation(sizes: list[int], keys: int, workers: list[int], seed: int):
+    """
+    Keys per second of generate_key_pairs for each number of prime-search processes;
+    seeded, so every column makes the same keys
+    """
+    print(f'{"bits":>6}' + ''.join(f'{f"{count} workers keys/s":>20}' for count in workers))
+    for bits in sizes:
+        rates = []
+        for count in workers:
+            start = perf_counter()
+            for key in range(keys):
+                generate_key_pairs(bits, workers=count, seed=seed + key)
+            rates.append(keys / (perf_counter() - start))
+        print(f'{bits:>6}' + ''.join(f'{rate:>20.3f}' for rate in rates))
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Time the RSA building blocks against Python built-ins')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[512, 1024, 2048, 4096])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--witnesses', type=int, default=10)
+    parser.add_argument('--primes', type=int, default=5, help='primes generated per size')
+    parser.add_argument('--messages', type=int, default=10, help='ciphertexts decrypted per size')
+    parser.add_argument('--kilobytes', type=int, default=16, help='payload encrypted and decrypted per size')
+    parser.add_argument('--keys', type=int, default=2, help='key pairs generated per size')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4], help='prime-search processes')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    bench_mod_exp(args.sizes, args.repeat)
+    bench_mod_context(args.sizes, args.witnesses)
+    bench_modinv(args.sizes, args.repeat)
+    bench_fixed_base(args.sizes, args.witnesses)
+    bench_prime_search(args.sizes, args.primes)
+    bench_private_key(args.sizes, args.messages, args.seed)
+    bench_bulk(args.sizes, args.kilobytes, args.workers, args.seed)
+    bench_key_generation(args.sizes, args.keys, args.workers, args.seed)
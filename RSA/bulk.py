@@ -0,0 +1,105 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from fermat import mod_exp
+from rsa import PrivateKey
+
+# Bytes of the payload length written in front of the payload, so padding can be dropped again
+LENGTH_HEADER = 8
+
+# Batches with fewer blocks than this are not worth starting processes for
+PARALLEL_MIN_BLOCKS = 64
+
+# The batch operation of this process, set once by _start_batch so tasks only carry blocks
+_operation: Callable[[int], int] | None = None
+
+
+def block_bytes(N: int) -> int:
+    """
+    Payload bytes per block under N: the most bytes whose every value is below N
+    """
+    size = (N.bit_length() - 1) // 8
+    if size < 1:
+        raise ValueError('N needs at least 9 bits to hold a byte per block')
+    return size
+
+
+def pack_blocks(data: bytes, N: int) -> list[int]:
+    """
+    The payload as integers below N: its length in LENGTH_HEADER bytes, then the payload,
+    zero-padded and cut into big-endian blocks of block_bytes(N)
+    """
+    size = block_bytes(N)
+    data = len(data).to_bytes(LENGTH_HEADER, 'big') + data
+    data += bytes(-len(data) % size)
+    return [int.from_bytes(data[i:i + size], 'big') for i in range(0, len(data), size)]
+
+
+def unpack_blocks(blocks: list[int], N: int) -> bytes:
+    """
+    The payload pack_blocks(payload, N) was made from
+    """
+    size = block_bytes(N)
+    try:
+        data = b''.join(block.to_bytes(size, 'big') for block in blocks)
+    except OverflowError:
+        raise ValueError(f'a block does not fit in {size} bytes') from None
+    length = int.from_bytes(data[:LENGTH_HEADER], 'big')
+    if len(data) < LENGTH_HEADER or length > len(data) - LENGTH_HEADER:
+        raise ValueError('the blocks do not hold a packed payload')
+    return data[LENGTH_HEADER:LENGTH_HEADER + length]
+
+
+def encrypt_many(messages: list[int], N: int, e: int, workers: int | None = 1) -> list[int]:
+    """
+    message^e mod N for every message
+    :param workers: processes for batches of PARALLEL_MIN_BLOCKS or more; None uses every CPU
+    """
+    return _run_batch(messages, (N, e), workers)
+
+
+def decrypt_many(ciphertexts: list[int], key: PrivateKey, workers: int | None = 1) -> list[int]:
+    """
+    key.decrypt of every ciphertext; every worker process builds the key once, CRT constants included
+    :param workers: processes for batches of PARALLEL_MIN_BLOCKS or more; None uses every CPU
+    """
+    return _run_batch(ciphertexts, (key.N, key.e, key.d, key.p, key.q), workers)
+
+
+def encrypt_bytes(data: bytes, N: int, e: int, workers: int | None = 1) -> list[int]:
+    return encrypt_many(pack_blocks(data, N), N, e, workers)
+
+
+def decrypt_bytes(ciphertexts: list[int], key: PrivateKey, workers: int | None = 1) -> bytes:
+    return unpack_blocks(decrypt_many(ciphertexts, key, workers), key.N)
+
+
+def _run_batch(values: list[int], key: tuple, workers: int | None) -> list[int]:
+    """
+    Apply the operation of `key` to every value, in this process or in chunks across worker processes
+    """
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(values) < PARALLEL_MIN_BLOCKS:
+        return list(map(_make_operation(*key), values))
+    # a few chunks per worker, so a slow chunk does not leave the others idle
+    chunk = -(-len(values) // (4 * workers))
+    with ProcessPoolExecutor(workers, initializer=_start_batch, initargs=key) as pool:
+        results = pool.map(_apply, [values[i:i + chunk] for i in range(0, len(values), chunk)])
+        return [value for part in results for value in part]
+
+
+def _make_operation(N: int, e: int, d: int | None = None, p: int | None = None,
+                    q: int | None = None) -> Callable[[int], int]:
+    if d is None:
+        return lambda message: mod_exp(message, e, N)
+    return PrivateKey(N, e, d, p, q).decrypt
+
+
+def _start_batch(*key):
+    global _operation
+    _operation = _make_operation(*key)
+
+
+def _apply(values: list[int]) -> list[int]:
+    return list(map(_operation, values))
@@ -1,5 +1,9 @@
 import argparse
+import math
 import random
+from collections import Counter
+from functools import lru_cache
+from typing import Callable
 
 
 # This is a convenience function for main(). You don't need to touch it.
@@ -7,19 +11,170 @@ def prime_test(N: int, k: int) -> tuple[str, str]:
     return fermat(N, k), miller_rabin(N, k)
 
 
-# You will need to implement this function and change the return value.
+# Window width for exponents of up to this many bits; wider windows trade precomputed odd powers
+# (2^(w-1) of them) for fewer multiplications while scanning the exponent
+WINDOW_SIZES = ((8, 1), (24, 2), (80, 3), (240, 4), (672, 5))
+
+
 def mod_exp(x: int, y: int, N: int) -> int:
-    if y == 0:  # constant work       # Time Complexity = O(1)
-        return 1  # constant work
-    else:
-        z: int = mod_exp(x, y // 2, N)  # Time Complexity = O(n^2)
-        if y % 2 == 0:
-            return (z * z) % N          # Time Complexity = O(n^2) + O(n^2) + c = O(n^2)
-        else:
-            return (x * (z * z)) % N    # Time Complexity = O(n^2) + O(n^2) + O(n^2) + c = O(n^2) Space Complexity =
-        # Recursion means O(logy) steps and at each step O(n^2) work takes place making the final Time complexity O(n^3)
-        # Recustion adds O(logy) calls to the stack frame and if y is an n bit number, logy = n so the Space Complexity
-        # is O(n)
+    """
+    x^y mod N by left-to-right sliding-window exponentiation, without recursion.
+    The odd powers x, x^3, ..., x^(2^w - 1) are precomputed; the exponent is then scanned from its top bit,
+    squaring once per bit and multiplying once per window of up to w bits that starts and ends with a 1.
+    """
+    if y == 0:
+        return 1 % N
+    return _run_plan(x % N, window_plan(y), lambda a, b: a * b % N)
+    # Time Complexity = O(n) squarings + O(n / w) multiplications = O(n^3)
+    # Space Complexity = O(2^w * n) for the odd powers, with no stack frames per bit
+
+
+class ModContext:
+    """
+    Arithmetic modulo one N, with the modulus-specific constants computed once
+    so they are shared by every exponentiation under N (primality witnesses, RSA messages under one key).
+
+    For odd N the Montgomery constants are kept as well: with montgomery=True, pow() works on
+    Montgomery residues a*R mod N (R = 2^bits of N), where a product is reduced with two multiplications
+    and a shift instead of a division. CPython divides big ints in C while REDC costs three Python-level
+    multiplications, so plain reduction is the faster default here.
+    """
+
+    def __init__(self, N: int, montgomery=False):
+        self.N = N
+        self.montgomery = montgomery and N % 2 == 1 and N > 1
+        if self.montgomery:
+            self.r_bits = N.bit_length()
+            self.mask = (1 << self.r_bits) - 1
+            # N * inverse = 1 mod 2^precision, doubling the precision each Newton step
+            inverse, precision = 1, 1
+            while precision < self.r_bits:  # O(log n) steps of O(n^2)
+                precision *= 2
+                inverse = inverse * (2 - N * inverse) & (1 << precision) - 1
+            self.n_prime = -inverse & self.mask
+
+    def mul(self, a: int, b: int) -> int:
+        return a * b % self.N
+
+    def pow(self, x: int, y: int) -> int:
+        """
+        x^y mod N; the window plan of each exponent is cached, so repeated exponents
+        (N - 1 for every witness, d for every message) are only scanned once
+        """
+        if y == 0:
+            return 1 % self.N
+        if not self.montgomery:
+            return _run_plan(x % self.N, window_plan(y), self.mul)
+        return self.from_montgomery(_run_plan(self.to_montgomery(x), window_plan(y), self.montgomery_mul))
+
+    def to_montgomery(self, a: int) -> int:
+        return (a << self.r_bits) % self.N
+
+    def from_montgomery(self, a: int) -> int:
+        return self.reduce(a)
+
+    def montgomery_mul(self, a: int, b: int) -> int:
+        """
+        The Montgomery residue of the product of two Montgomery residues
+        """
+        return self.reduce(a * b)
+
+    def reduce(self, t: int) -> int:
+        """
+        t / R mod N for 0 <= t < N * R (Montgomery's REDC)
+        """
+        u = (t + ((t & self.mask) * self.n_prime & self.mask) * self.N) >> self.r_bits
+        return u - self.N if u >= self.N else u
+
+
+class FixedBase:
+    """
+    Powers of one base modulo N for many exponents of up to exponent_bits bits
+    (fixed-base windowing of Brickell, Gordon, McCurley and Wilson).
+
+    The table holds base^(2^(k * i)) for every k-bit digit i of an exponent, so no squaring is left for pow():
+    with y = sum of d_i * 2^(k * i), the powers are multiplied into a running product from the largest digit
+    value down, and that product into the result once per digit value, so the digit value is the number of
+    times it gets in. That is one multiplication per digit plus at most 2^(k + 1) more, against one squaring
+    per bit for mod_exp. The table costs ceil(exponent_bits / k) residues of N; a wider window k trades
+    memory for more multiplications per exponent. Longer exponents fall back to mod_exp.
+    """
+
+    def __init__(self, base: int, N: int, exponent_bits: int, window: int | None = None):
+        self.base, self.N = base % N, N
+        self.window = window or min(range(1, 17), key=lambda k: -(-exponent_bits // k) + 2 ** k)
+        self.table = [self.base]
+        for _ in range(-(-exponent_bits // self.window) - 1):  # O(n) squarings of O(n^2)
+            power = self.table[-1]
+            for _ in range(self.window):
+                power = power * power % N
+            self.table.append(power)
+
+    @property
+    def exponent_bits(self) -> int:
+        return len(self.table) * self.window
+
+    def pow(self, y: int) -> int:
+        if y.bit_length() > self.exponent_bits:
+            return mod_exp(self.base, y, self.N)
+        N = self.N
+        by_digit: list[list[int]] = [[] for _ in range(1 << self.window)]
+        mask = (1 << self.window) - 1
+        for power in self.table:  # O(n / k)
+            if not y:
+                break
+            by_digit[y & mask].append(power)
+            y >>= self.window
+        result = running = 1
+        for powers in reversed(by_digit[1:]):  # O(2^k + n / k) multiplications of O(n^2)
+            for power in powers:
+                running = running * power % N
+            if running != 1:
+                result = result * running % N
+        return result % N
+
+
+@lru_cache(maxsize=128)
+def window_plan(y: int) -> tuple[tuple[int, int], ...]:
+    """
+    The sliding-window schedule of exponent y > 0, read from its top bit: (squarings, odd power) steps, where
+    odd power i multiplies by x^(2i + 1) after the squarings and -1 only squares (trailing zero bits).
+    Every window holds at most w bits, starting and ending with a 1.
+    """
+    bits = bin(y)[2:]
+    window = next((w for limit, w in WINDOW_SIZES if len(bits) <= limit), 6)
+    plan = []
+    squarings = 0
+    i = 0
+    while i < len(bits):  # O(n)
+        if bits[i] == '0':
+            squarings += 1
+            i += 1
+            continue
+        end = min(i + window, len(bits))
+        while bits[end - 1] == '0':
+            end -= 1
+        plan.append((squarings + end - i, int(bits[i:end], 2) >> 1))
+        squarings = 0
+        i = end
+    plan.append((squarings, -1))
+    return tuple(plan)
+
+
+def _run_plan(x: int, plan: tuple[tuple[int, int], ...], multiply: Callable[[int, int], int]) -> int:
+    odd_powers = [x]
+    x_squared = multiply(x, x)
+    for _ in range(max(index for _, index in plan)):  # O(2^w) multiplications of n bit numbers
+        odd_powers.append(multiply(odd_powers[-1], x_squared))
+
+    # the first window starts at the top bit, so its squarings would only square 1
+    result = odd_powers[plan[0][1]]
+    for squarings, index in plan[1:]:
+        for _ in range(squarings):
+            result = multiply(result, result)
+        if index >= 0:
+            result = multiply(result, odd_powers[index])
+    return result
 
 
 # You will need to implement this function and change the return value.
@@ -46,30 +201,69 @@ def fermat(N: int, k: int) -> str:
     return "prime"
 
 
+# Trial division by these primes rejects most composites before any exponentiation
+SMALL_PRIMES = tuple(p for p in range(2, 1000) if all(p % q for q in range(2, int(p ** 0.5) + 1)))
+SMALL_PRIMES_PRODUCT = math.prod(SMALL_PRIMES)
+
+# Every composite below 3.3 * 10^24 (so every N < 2^64) fails the strong test for one of these bases
+DETERMINISTIC_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
 # You will need to implement this function and change the return value, which should be
 # either 'prime' or 'composite'.
 #
 # To generate random values for a, you will most likely want to use
 # random.randint(low, hi) which gives a random integer between low and
 # hi, inclusive.
-def miller_rabin(N: int, k: int) -> str:
-    for i in range(k):  # O(k)
-        a: int = random.randint(1, N - 1)
-        if mod_exp(a, N - 1, N) != 1:  # O(n^3)
+def miller_rabin(N: int, k: int, stats: Counter | None = None, trial_division=True) -> str:
+    """
+    Trial division by SMALL_PRIMES first, then strong probable-prime tests: with N - 1 = 2^s * d (d odd),
+    each witness costs one exponentiation a^d and at most s - 1 squarings.
+    Below 2^64 the fixed DETERMINISTIC_WITNESSES make the answer exact and k is ignored;
+    above, k random witnesses leave at most a 4^-k chance of calling a composite prime.
+    With stats, stats['rounds'] counts the witnesses tried.
+    :param trial_division: False for candidates already sieved by the small primes, which only checks parity
+    """
+    if N < 2:
+        return "composite"
+    if trial_division:
+        if math.gcd(N, SMALL_PRIMES_PRODUCT) != 1:  # O(n) for a fixed product
+            return "prime" if N in SMALL_PRIMES else "composite"
+        if N < SMALL_PRIMES[-1] ** 2:
+            return "prime"
+    elif N % 2 == 0:
+        return "prime" if N == 2 else "composite"
+
+    s = ((N - 1) & (1 - N)).bit_length() - 1  # trailing zero bits of N - 1
+    d = (N - 1) >> s
+    if N < 1 << 64:
+        witnesses = DETERMINISTIC_WITNESSES
+    else:
+        witnesses = (random.randint(2, N - 2) for _ in range(k))
+    for a in witnesses:  # O(k)
+        if a % N == 0:
+            continue  # a deterministic witness that is N itself, only without trial division
+        if stats is not None:
+            stats['rounds'] += 1
+        if not _strong_probable_prime(N, a, d, s):  # O(n^3)
             return "composite"
-        y = (N - 1) // 2
-        while y % 2 == 0:  # O(logN) = O(n)
-            result = mod_exp(a, y, N) # O(n^3)
-            if result == 1:
-                y = y // 2
-            elif result != 1:
-                if result == N - 1 or result == -1:
-                    return "prime"
-                else:
-                    return "composite"
     return "prime"
 
 
+def _strong_probable_prime(N: int, a: int, d: int, s: int) -> bool:
+    """
+    Whether N passes the strong test to base a: a^d = 1, or a^(2^r * d) = -1 for some r < s
+    """
+    x = mod_exp(a, d, N)  # O(n^3)
+    if x == 1 or x == N - 1:
+        return True
+    for _ in range(s - 1):  # O(s) squarings of O(n^2)
+        x = x * x % N
+        if x == N - 1:
+            return True
+    return False
+
+
 def main(number: int, k: int):
     fermat_call, miller_rabin_call = prime_test(number, k)
     fermat_prob = fprobability(k)
@@ -1,16 +1,16 @@
+import multiprocessing
+import multiprocessing.synchronize
+import os
 import random
-import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 # This may come in handy...
 from fermat import miller_rabin
 from fermat import fermat
-
-# If you use a recursive implementation of `mod_exp` or extended-euclid,
-# you recurse once for every bit in the number.
-# If your number is more than 1000 bits, you'll exceed python's recursion limit.
-# Here we raise the limit so the tests can run without any issue.
-# Can you implement `mod_exp` and extended-euclid without recursion?
-sys.setrecursionlimit(4000)
+from fermat import ModContext
+from fermat import mod_exp
+from fermat import SMALL_PRIMES
 
 # When trying to find a relatively prime e for (p-1) * (q-1)
 # use this list of 25 primes
@@ -20,27 +20,253 @@ primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67
 
 # Implement this function
 def ext_euclid(a: int, b: int) -> tuple[int, int, int]:
-    if a < b:        # constant
-        a, b = b, a  # constant
-    if b == 0:
-        return 1, 0, a
-    x, y, d = ext_euclid(b, a % b) # O(n^2) + constant = O(n^2)
-    return y, x - (a // b) * y, d  # O(n^2) + O(n) + constant = O(n^2)
-    # the recursion makes the O(n^2) work happen O(n) times making the time complexity O(n^3)
+    """
+    Coefficients x, y and d = gcd(a, b) with a * x + b * y = d, for a, b >= 0.
+    x always belongs to a and y to b, whichever is larger; (1, 0, a) when b == 0.
+    """
+    x0, x1, y0, y1 = 1, 0, 0, 1  # a = a0 * x0 + b0 * y0 and b = a0 * x1 + b0 * y1 throughout
+    while b:  # O(n) steps
+        q, r = divmod(a, b)  # O(n^2)
+        a, b = b, r
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return x0, y0, a
+    # Time Complexity = O(n) steps of O(n^2) = O(n^3), Space Complexity = O(n) with no recursion
+
+
+# Bits of the leading digits lehmer_ext_euclid runs single-word Euclid steps on
+LEHMER_DIGIT = 62
+
+# Below this many bits a full division costs less than the Python-level work of a Lehmer step,
+# so modinv uses plain Euclid
+LEHMER_MIN_BITS = 3072
+
+
+def lehmer_ext_euclid(a: int, b: int) -> tuple[int, int, int]:
+    """
+    ext_euclid by Lehmer's method, with the same contract.
+    While the operands are large, Euclid runs on their leading LEHMER_DIGIT bits alone, as long as the
+    quotients provably match those of the full numbers (Knuth's Algorithm L); the word-sized cofactors
+    collected are then applied to the operands and coefficients at once. Each round replaces about
+    LEHMER_DIGIT / 2 full-size divisions by a few multiplications with one-word numbers.
+    """
+    swapped = a < b
+    if swapped:
+        a, b = b, a
+    x0, x1, y0, y1 = 1, 0, 0, 1
+    while b >> LEHMER_DIGIT:  # O(n / LEHMER_DIGIT) rounds
+        shift = a.bit_length() - LEHMER_DIGIT
+        ah, bh = a >> shift, b >> shift
+        # (A B; C D) maps the operands at the start of the round to the current ones
+        A, B, C, D = 1, 0, 0, 1
+        while bh + C and bh + D:  # O(LEHMER_DIGIT) steps on one-word numbers
+            q = (ah + A) // (bh + C)
+            if q != (ah + B) // (bh + D):
+                break
+            A, B, C, D = C, D, A - q * C, B - q * D
+            ah, bh = bh, ah - q * bh
+        if B == 0:
+            # not one quotient was certain, so take a full division step
+            q, r = divmod(a, b)
+            a, b = b, r
+            x0, x1 = x1, x0 - q * x1
+            y0, y1 = y1, y0 - q * y1
+        else:
+            a, b = A * a + B * b, C * a + D * b  # O(n) each, one operand is a single word
+            x0, x1 = A * x0 + B * x1, C * x0 + D * x1
+            y0, y1 = A * y0 + B * y1, C * y0 + D * y1
+    while b:  # the last word with plain Euclid
+        q, r = divmod(a, b)
+        a, b = b, r
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return (y0, x0, a) if swapped else (x0, y0, a)
+    # Time Complexity = O(n / w) rounds of O(n * w) = O(n^2) for w bit digits
+
+
+def modinv(a: int, m: int) -> int:
+    """
+    The inverse of a modulo m > 1, in [0, m); ValueError when gcd(a, m) != 1, like pow(a, -1, m)
+    """
+    gcd = lehmer_ext_euclid if m.bit_length() >= LEHMER_MIN_BITS else ext_euclid
+    x, _, d = gcd(a % m, m)
+    if d != 1:
+        raise ValueError(f'{a} is not invertible modulo {m}')
+    return x % m
+
+
+# Odd candidates sieved at a time by generate_large_prime
+SIEVE_WINDOW = 1024
+
+# Set in the processes of generate_primes once enough primes are found
+_stop: multiprocessing.synchronize.Event | None = None
+
 
 # Implement this function
-def generate_large_prime(bits=512) -> int:
-    is_prime: bool = False
-    x: int = 0
-    while not is_prime:  # O(n)
-        x = random.getrandbits(bits)  # O(1)
-        if miller_rabin(x, 100) == "prime": # O(n^4)
-            return x
+def generate_large_prime(bits=512, k=100, stats: Counter | None = None, rng: random.Random = random) -> int:
+    """
+    A random prime of exactly `bits` bits whose top two bits are set, so the product of two is 2 * bits long.
+    Odd candidates are walked upwards from a random start, a window at a time. Each small prime's residue
+    at the window start is kept and advanced by addition, and marks its multiples in the window, so only
+    candidates without a small factor reach Miller-Rabin (k rounds).
+    With stats, counts 'primes', 'candidates' (odd numbers walked), 'tested' (sieve survivors)
+    and 'rounds' (Miller-Rabin witnesses) across calls.
+    :param rng: source of the random start, e.g. a seeded random.Random
+    """
+    stats = Counter() if stats is None else stats
+    sieving = _sieving_primes(bits)
+    while True:
+        x = _random_start(bits, rng)
+        residues = [x % p for p in sieving]
+        while x < 1 << bits:  # O(n) windows expected, each O(window + sieving primes)
+            prime = _search_window(x, bits, k, sieving, residues, stats)
+            if prime is not None:
+                return prime
+            x += 2 * SIEVE_WINDOW
+
+
+def generate_primes(bits: int, count: int, workers: int | None = 1, seed: int | None = None,
+                    k=100, stats: Counter | None = None) -> list[int]:
+    """
+    `count` primes as generate_large_prime makes them, searched by several processes at once.
+    The search is split into numbered streams: stream i sieves the window at a random start drawn from
+    (seed, i). Streams are handed to `workers` processes in order, and the primes are taken from the
+    lowest-numbered streams that found one, so a seed gives the same primes for any number of workers.
+    Once those streams are known, streams still queued are cancelled and the ones running are told to stop
+    through a shared event, which they check before every Miller-Rabin test, so the pool winds down at once.
+    :param workers: processes racing the streams; defaults to the number of CPUs, 1 searches in this process
+    :param seed: makes the primes reproducible; None draws one from `random`
+    """
+    stats = Counter() if stats is None else stats
+    if bits < 2:
+        raise ValueError('a prime needs at least 2 bits')
+    seed = random.getrandbits(64) if seed is None else seed
+    found: dict[int, int | None] = {}
+    primes: list[int] = []
+    taken = 0  # streams before this one have been read into primes
+
+    def take_finished():
+        nonlocal taken
+        while taken in found and len(primes) < count:
+            prime = found.pop(taken)
+            if prime is not None:
+                primes.append(prime)
+            taken += 1
+
+    if workers == 1:
+        while len(primes) < count:
+            found[taken], work = _search_stream(bits, k, seed, taken)
+            stats.update(work)
+            take_finished()
+        return primes
+
+    workers = workers or os.cpu_count()
+    stop = multiprocessing.Event()
+    pool = ProcessPoolExecutor(workers, initializer=_start_search, initargs=(stop,))
+    try:
+        running = {}
+        submitted = 0
+        while len(primes) < count:
+            # two streams per worker keep every process busy while results are collected
+            while len(running) < 2 * workers:
+                running[pool.submit(_search_stream, bits, k, seed, submitted)] = submitted
+                submitted += 1
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                found[running.pop(future)], work = future.result()
+                stats.update(work)
+            take_finished()
+    finally:
+        stop.set()
+        pool.shutdown(cancel_futures=True)
+    return primes
+
+
+def _start_search(stop: multiprocessing.synchronize.Event):
+    global _stop
+    _stop = stop
+
+
+def _search_stream(bits: int, k: int, seed: int, stream: int) -> tuple[int | None, Counter]:
+    """
+    The first prime in the window of stream `stream`, or None, and the work it took
+    """
+    stats = Counter()
+    sieving = _sieving_primes(bits)
+    x = _random_start(bits, random.Random(f'{seed}:{stream}'))
+    return _search_window(x, bits, k, sieving, [x % p for p in sieving], stats, _stop), stats
+
+
+def _sieving_primes(bits: int) -> list[int]:
+    if bits < 2:
+        raise ValueError('a prime needs at least 2 bits')
+    # the smallest candidate is above 2^(bits - 1), so no sieving prime is ever a candidate itself
+    return [p for p in SMALL_PRIMES[1:] if p < 1 << (bits - 1)]
+
+
+def _random_start(bits: int, rng: random.Random) -> int:
+    return rng.getrandbits(bits) | 0b11 << (bits - 2) | 1
+
+
+def _search_window(x: int, bits: int, k: int, sieving: list[int], residues: list[int], stats: Counter,
+                   stop: multiprocessing.synchronize.Event | None = None) -> int | None:
+    """
+    The first prime among the SIEVE_WINDOW odd numbers from x (below 2^bits), or None.
+    residues holds x mod each sieving prime and is advanced to the next window.
+    Also None as soon as `stop` is set.
+    """
+    composite = bytearray(SIEVE_WINDOW)
+    for i, p in enumerate(sieving):
+        # x + 2j = 0 mod p  <=>  j = -residue / 2 mod p, and (p + 1) / 2 inverts 2
+        first = (p - residues[i]) * ((p + 1) // 2) % p
+        composite[first::p] = b'\x01' * len(range(first, SIEVE_WINDOW, p))
+        residues[i] = (residues[i] + 2 * SIEVE_WINDOW) % p
+    for j in range(SIEVE_WINDOW):
+        candidate = x + 2 * j
+        if candidate >= 1 << bits:
+            break
+        stats['candidates'] += 1
+        if composite[j]:
+            continue
+        if stop is not None and stop.is_set():
+            return None
+        stats['tested'] += 1
+        # the sieve has already done miller_rabin's trial division
+        if miller_rabin(candidate, k, stats, trial_division=False) == "prime":  # O(n^3) per round
+            stats['primes'] += 1
+            return candidate
+    return None
+
 
 # Implement this function
-def generate_key_pairs(bits: int) -> tuple[int, int, int]:
-    p: int = generate_large_prime(bits) # O(n^5)
-    q: int = generate_large_prime(bits) # O(n^5)
+def generate_key_pairs(bits: int, workers: int | None = 1, seed: int | None = None) -> tuple[int, int, int]:
+    """
+    N, e and d of a new key; generate_key keeps p and q as well
+    :param workers: processes searching for p and q at once, see generate_primes
+    :param seed: makes the key reproducible, whatever the number of workers
+    """
+    key = generate_key(bits, workers, seed)
+    return key.N, key.e, key.d
+
+
+def generate_key(bits: int, workers: int | None = 1, seed: int | None = None) -> 'PrivateKey':
+    """
+    A key with two distinct primes of `bits` bits. Below 5 bits only one prime has both top bits set,
+    so p = q would be forced and (p-1)*(q-1) would not be phi(N): ValueError.
+    """
+    if bits < 5:
+        raise ValueError('a key needs primes of at least 5 bits, so that p and q can differ')
+    if workers == 1 and seed is None:
+        p: int = generate_large_prime(bits) # O(n^5)
+        q: int = generate_large_prime(bits) # O(n^5)
+        while q == p:
+            q = generate_large_prime(bits)
+    else:
+        count = 2
+        # a seed gives the same streams, so asking for one more prime only extends the list
+        while len(found := list(dict.fromkeys(generate_primes(bits, count, workers, seed)))) < 2:
+            count += 1
+        p, q = found[:2]  # O(n^5 / workers)
     N: int = p * q  # O(n^2) for multiplying n bit numbers
     e: int = 0
 
@@ -52,4 +278,55 @@ def generate_key_pairs(bits: int) -> tuple[int, int, int]:
     if y < 0:
         y += (p-1)*(q-1)  # O(n^2 + O(1) for multiplying n bit numbers and adding
 
-    return N, e, y
+    return PrivateKey(N, e, y, p, q)
+
+
+class PrivateKey:
+    """
+    An RSA key that decrypts and signs with the Chinese Remainder Theorem when it knows p and q:
+    c^d mod N is put together from c^dP mod p and c^dQ mod q (dP = d mod p - 1, dQ = d mod q - 1),
+    two exponentiations with half-size exponents under half-size moduli, about 4x less work.
+    Without p and q it falls back to c^d mod N.
+    """
+
+    def __init__(self, N: int, e: int, d: int, p: int | None = None, q: int | None = None):
+        self.N, self.e, self.d = N, e, d
+        self.p = self.q = None
+        if p is not None and q is not None:
+            if p * q != N:
+                raise ValueError('p * q must equal N')
+            self.p, self.q = p, q
+            self.dP, self.dQ = d % (p - 1), d % (q - 1)
+            self.qInv = modinv(q, p)
+
+    @property
+    def has_crt(self) -> bool:
+        return self.p is not None
+
+    def encrypt(self, message: int) -> int:
+        return mod_exp(message, self.e, self.N)
+
+    def decrypt(self, ciphertext: int) -> int:
+        if not self.has_crt:
+            return mod_exp(ciphertext, self.d, self.N)  # O(n^3)
+        m1 = mod_exp(ciphertext, self.dP, self.p)  # O((n/2)^3)
+        m2 = mod_exp(ciphertext, self.dQ, self.q)  # O((n/2)^3)
+        # Garner: the m = m2 (mod q) that is also m1 mod p
+        return m2 + self.qInv * (m1 - m2) % self.p * self.q  # O(n^2)
+
+    def sign(self, message: int) -> int:
+        return self.decrypt(message)
+
+    def verify(self, message: int, signature: int) -> bool:
+        return self.encrypt(signature) == message % self.N
+
+
+def encrypt(message: int, N: int, e: int, context: ModContext | None = None) -> int:
+    """
+    message^e mod N; with a ModContext of N, under its arithmetic (e.g. Montgomery) instead of mod_exp
+    """
+    return context.pow(message, e) if context else mod_exp(message, e, N)
+
+
+def decrypt(ciphertext: int, N: int, d: int, context: ModContext | None = None) -> int:
+    return context.pow(ciphertext, d) if context else mod_exp(ciphertext, d, N)
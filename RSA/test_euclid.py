@@ -1,4 +1,5 @@
 import random
+import pytest
 from byu_pytest_utils import max_score
 from rsa import generate_key_pairs
 from fermat import mod_exp
@@ -27,3 +28,135 @@ def test_key_pair_encoding_decoding():
         assert (
             message == decrypted_message
         ), f"Failed for bit size {bits}: message={message}, decrypted_message={decrypted_message}"
+
+
+@max_score(5)
+def test_encrypt_decrypt_with_context():
+    """Encryption and decryption share one ModContext per key"""
+    from fermat import ModContext
+    from rsa import decrypt, encrypt
+
+    N, e, d = generate_key_pairs(256)
+    for context in (None, ModContext(N), ModContext(N, montgomery=True)):
+        messages = [random.getrandbits(200) for _ in range(5)]
+        ciphertexts = [encrypt(m, N, e, context) for m in messages]
+        assert ciphertexts == [mod_exp(m, e, N) for m in messages]
+        assert [decrypt(c, N, d, context) for c in ciphertexts] == messages
+
+
+@max_score(5)
+def test_generate_large_prime_sieved():
+    """Primes have exactly the requested bits, and the statistics count the work per prime"""
+    from collections import Counter
+    from fermat import miller_rabin
+    from rsa import generate_large_prime
+
+    stats = Counter()
+    for bits in [2, 3, 16, 64, 256]:
+        p = generate_large_prime(bits, stats=stats, rng=random.Random(bits))
+        assert p.bit_length() == bits and p >> (bits - 2) == 0b11
+        assert miller_rabin(p, 20) == "prime"
+        assert p == generate_large_prime(bits, rng=random.Random(bits))
+    assert stats['primes'] == 5
+    assert stats['candidates'] >= stats['tested'] >= 5
+    assert stats['rounds'] >= stats['tested']
+
+
+@max_score(5)
+def test_generate_key_pairs_parallel():
+    """A seeded key is the same whether the primes are searched in this process or by several"""
+    from rsa import generate_primes
+
+    key = generate_key_pairs(128, seed=312)
+    assert key == generate_key_pairs(128, workers=2, seed=312)
+    N, e, d = key
+    message = random.getrandbits(100)
+    assert mod_exp(mod_exp(message, e, N), d, N) == message
+    assert generate_primes(64, 3, workers=2, seed=1) == generate_primes(64, 3, seed=1)
+
+
+@max_score(5)
+def test_ext_euclid_and_modinv():
+    """Both extended Euclids keep x with a and y with b, and modinv agrees with pow(a, -1, m)"""
+    import math
+    from rsa import ext_euclid, lehmer_ext_euclid, modinv
+
+    for bits in [8, 64, 512, 4096]:
+        for _ in range(20):
+            a, b = random.getrandbits(bits), random.getrandbits(random.choice([8, bits]))
+            for gcd in (ext_euclid, lehmer_ext_euclid):
+                for a_, b_ in ((a, b), (b, a)):
+                    x, y, d = gcd(a_, b_)
+                    assert a_ * x + b_ * y == d == math.gcd(a_, b_)
+            m = b | 1 << bits
+            if math.gcd(a, m) == 1:
+                assert modinv(a, m) == pow(a, -1, m)
+    with pytest.raises(ValueError):
+        modinv(6, 9)
+
+
+@max_score(5)
+def test_private_key_crt():
+    """Decrypting and signing through the CRT agree with c^d mod N"""
+    from rsa import PrivateKey, generate_key
+
+    key = generate_key(256)
+    assert key.has_crt and key.p * key.q == key.N
+    public_only = PrivateKey(key.N, key.e, key.d)
+    assert not public_only.has_crt
+    for _ in range(10):
+        message = random.randrange(key.N)
+        ciphertext = key.encrypt(message)
+        assert ciphertext == mod_exp(message, key.e, key.N)
+        assert key.decrypt(ciphertext) == public_only.decrypt(ciphertext) == message
+        assert key.verify(message, key.sign(message))
+        assert not key.verify(message + 1, key.sign(message))
+    with pytest.raises(ValueError):
+        PrivateKey(key.N, key.e, key.d, key.p, key.q + 2)
+
+
+@max_score(5)
+def test_bulk_bytes():
+    """Byte payloads survive block packing, encryption and decryption, in this process or in a pool"""
+    from bulk import PARALLEL_MIN_BLOCKS, decrypt_bytes, encrypt_bytes, pack_blocks, unpack_blocks
+    from rsa import generate_key
+
+    key = generate_key(128)
+    for data in [b'', b'\x00', b'RSA', random.randbytes(1000)]:
+        assert unpack_blocks(pack_blocks(data, key.N), key.N) == data
+        ciphertexts = encrypt_bytes(data, key.N, key.e)
+        assert ciphertexts[0] == mod_exp(pack_blocks(data, key.N)[0], key.e, key.N)
+        assert decrypt_bytes(ciphertexts, key) == data
+
+    data = random.randbytes(40 * PARALLEL_MIN_BLOCKS)
+    ciphertexts = encrypt_bytes(data, key.N, key.e, workers=2)
+    assert ciphertexts == encrypt_bytes(data, key.N, key.e)
+    assert decrypt_bytes(ciphertexts, key, workers=2) == data
+    with pytest.raises(ValueError):
+        unpack_blocks([key.N], key.N)
+
+
+@max_score(5)
+def test_generate_primes_stops_workers():
+    """The streams still running are stopped and the pool is gone by the time the primes are returned"""
+    import multiprocessing
+    from rsa import generate_primes
+
+    primes = generate_primes(512, 2, workers=3, seed=21)
+    assert multiprocessing.active_children() == []
+    assert primes == generate_primes(512, 2, seed=21)
+
+
+@max_score(5)
+def test_generate_key_small_bits():
+    """Below 5 bits p would equal q, so there is no key; from 5 bits every message comes back"""
+    from rsa import generate_key
+
+    for bits in [2, 3, 4]:
+        with pytest.raises(ValueError):
+            generate_key_pairs(bits)
+        with pytest.raises(ValueError):
+            generate_key(bits, workers=2, seed=1)
+    for key in [generate_key(5), generate_key(5, seed=3), generate_key(6)]:
+        assert key.p != key.q
+        assert all(key.decrypt(key.encrypt(m)) == m for m in range(2, key.N))
@@ -62,3 +62,51 @@ def test_composites_miller_rabin() -> None:
     for N in composite_args:
         call = fermat(N, 100)
         assert call == "composite"
+
+
+@max_score(5)
+def test_mod_exp_large() -> None:
+    """mod_exp is iterative, so exponents far beyond the recursion limit work"""
+    N = (1 << 4253) - 1
+    for x, y in [(3, N - 1), (65537, (1 << 5000) + 12345), (N + 5, 1), (0, 7), (7, 0)]:
+        assert mod_exp(x, y, N) == pow(x, y, N)
+    assert mod_exp(5, 3, 1) == 0
+
+
+@max_score(5)
+def test_mod_context() -> None:
+    """A ModContext gives the same powers with and without Montgomery reduction"""
+    from fermat import ModContext
+
+    for N in [17, 345, 7520681183, (1 << 521) - 1, 2 ** 200]:
+        plain, montgomery = ModContext(N), ModContext(N, montgomery=True)
+        for x, y in [(2, 10), (N - 1, N - 1), (123456789, 65537), (N + 3, 0)]:
+            assert plain.pow(x, y) == montgomery.pow(x, y) == pow(x, y, N)
+
+
+@max_score(5)
+def test_miller_rabin_strong_pseudoprimes() -> None:
+    """Carmichael numbers and strong pseudoprimes to small bases are composite; small N is exact"""
+    for N in [0, 1, 4, 561, 41041, 3215031751, 2152302898747, 3825123056546413051, 318665857834031151167461]:
+        assert miller_rabin(N, 20) == "composite"
+    for N in [2, 3, 997, 1009, 2 ** 61 - 1, 2 ** 64 - 59, 2 ** 127 - 1]:
+        assert miller_rabin(N, 20) == "prime"
+
+    # without trial division (for sieved candidates) small N are still exact
+    small_primes = [N for N in range(2, 3000) if all(N % p for p in range(2, int(N ** 0.5) + 1))]
+    assert [N for N in range(3000) if miller_rabin(N, 20, trial_division=False) == "prime"] == small_primes
+
+
+@max_score(5)
+def test_fixed_base() -> None:
+    """A FixedBase table agrees with pow for every window, past its exponent size too"""
+    import random
+    from fermat import FixedBase
+
+    N = random.getrandbits(512) | 1 << 511 | 1
+    for base in [0, 3, 65537, random.getrandbits(600)]:
+        for window in [None, 1, 4, 9]:
+            table = FixedBase(base, N, 256, window)
+            assert len(table.table) * table.window >= 256
+            for y in [0, 1, 2, random.getrandbits(256), random.getrandbits(300)]:
+                assert table.pow(y) == pow(base, y, N)